@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import dish, load_data, menu, reports, submenu
+from app.api.api_v1.endpoints import dish, load_data, menu, reports, stats, submenu
 
 router = APIRouter()
 router.include_router(menu.router, prefix="/menus", tags=["Menus"])
@@ -20,3 +20,4 @@ router.include_router(
     tags=["Load Data"],
 )
 router.include_router(reports.router, prefix="/reports", tags=["Reports"])
+router.include_router(stats.router, prefix="/stats", tags=["Stats"])
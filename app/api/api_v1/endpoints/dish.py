@@ -1,13 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from fastapi.responses import JSONResponse
 from pydantic.types import UUID4
 
-from app.db.models import DishCreate, DishRead, DishUpdate, Menu, Submenu
-from app.services.dependencies import (
-    get_submenu_id,
-    validate_menu_model,
-    validate_submenu_model,
-)
+from app.core.config import settings
+from app.db.models import DishCreate, DishRead, DishUpdate
+from app.services.dependencies import validate_dish_path
 from app.services.dish import DishCRUDService, get_dish_service
 
 router = APIRouter()
@@ -16,9 +13,16 @@ router = APIRouter()
 @router.get("/", summary="Получить список блюд", response_model=list[DishRead])
 async def list_dish(
     service: DishCRUDService = Depends(get_dish_service),
-    submenu_id: str = Depends(get_submenu_id),
-) -> list[DishRead]:
-    return await service.list(submenu_id=submenu_id)
+    parent_ids: dict = Depends(validate_dish_path),
+    cursor: str | None = None,
+    limit: int = Query(
+        default=settings.PAGE_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.PAGE_MAX_LIMIT,
+    ),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.list_response(cursor, limit, if_none_match, **parent_ids)
 
 
 @router.get(
@@ -29,8 +33,10 @@ async def list_dish(
 async def get_dish(
     item_id: UUID4,
     service: DishCRUDService = Depends(get_dish_service),
-) -> DishRead | None:
-    return await service.get(item_id)
+    parent_ids: dict = Depends(validate_dish_path),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.get_response(item_id, if_none_match, **parent_ids)
 
 
 @router.post(
@@ -42,9 +48,9 @@ async def get_dish(
 async def add_dish(
     item_create_schema: DishCreate,
     service: DishCRUDService = Depends(get_dish_service),
-    submenu: Submenu = Depends(validate_submenu_model),
+    parent_ids: dict = Depends(validate_dish_path),
 ) -> DishRead | None:
-    return await service.create(item_create_schema, submenu_id=submenu.id)
+    return await service.create(item_create_schema, **parent_ids)
 
 
 @router.patch("/{item_id}", summary="Изменить блюдо", response_model=DishRead)
@@ -52,19 +58,15 @@ async def update_dish(
     item_id: UUID4,
     item_update_schema: DishUpdate,
     service: DishCRUDService = Depends(get_dish_service),
+    parent_ids: dict = Depends(validate_dish_path),
 ) -> DishRead | None:
-    return await service.update(item_id, item_update_schema)
+    return await service.update(item_id, item_update_schema, **parent_ids)
 
 
 @router.delete("/{item_id}", summary="Удалить блюдо")
 async def delete_dish(
     item_id: UUID4,
     service: DishCRUDService = Depends(get_dish_service),
-    submenu: Submenu = Depends(validate_submenu_model),
-    menu: Menu = Depends(validate_menu_model),
+    parent_ids: dict = Depends(validate_dish_path),
 ) -> JSONResponse:
-    return await service.delete(
-        item_id,
-        submenu_id=submenu.id,
-        menu_id=menu.id,
-    )
+    return await service.delete(item_id, **parent_ids)
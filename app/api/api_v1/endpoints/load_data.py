@@ -1,10 +1,13 @@
+from aioredis import Redis
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.services.dish import DishCRUDService, get_dish_service
+from app.db.cache import get_cache, get_local_cache
+from app.db.database import get_session
+from app.db.local_cache import LocalCache
+from app.services.base_cache_service import BaseCacheService
 from app.services.load_data import load_json_data
-from app.services.menu import MenuCRUDService, get_menu_service
-from app.services.submenu import SubmenuCRUDService, get_submenu_service
 
 router = APIRouter()
 
@@ -15,11 +18,11 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
 )
 async def load_data(
-    menu_service: MenuCRUDService = Depends(get_menu_service),
-    submenu_service: SubmenuCRUDService = Depends(get_submenu_service),
-    dish_service: DishCRUDService = Depends(get_dish_service),
+    db_session: AsyncSession = Depends(get_session),
+    cache: Redis = Depends(get_cache),
+    local_cache: LocalCache | None = Depends(get_local_cache),
 ) -> JSONResponse:
-    await load_json_data(menu_service, submenu_service, dish_service)
+    await load_json_data(db_session, BaseCacheService(cache, local_cache))
     response_data = {"message": "Test DB data loaded"}
     return JSONResponse(
         content=response_data,
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from fastapi.responses import JSONResponse
 from pydantic.types import UUID4
 
-from app.db.models import MenuCreate, MenuRead, MenuUpdate
+from app.core.config import settings
+from app.db.models import MenuCreate, MenuRead, MenuTree, MenuUpdate
 from app.services.menu import MenuCRUDService, get_menu_service
 
 router = APIRouter()
@@ -11,8 +12,40 @@ router = APIRouter()
 @router.get("/", summary="Получить список меню", response_model=list[MenuRead])
 async def list_menu(
     service: MenuCRUDService = Depends(get_menu_service),
-) -> list[MenuRead]:
-    return await service.list()
+    cursor: str | None = None,
+    limit: int = Query(
+        default=settings.PAGE_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.PAGE_MAX_LIMIT,
+    ),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.list_response(cursor, limit, if_none_match)
+
+
+@router.get(
+    "/tree",
+    summary="Получить все меню с подменю и блюдами",
+    response_model=list[MenuTree],
+)
+async def list_menu_tree(
+    service: MenuCRUDService = Depends(get_menu_service),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.tree_response(if_none_match=if_none_match)
+
+
+@router.get(
+    "/{menu_id}/tree",
+    summary="Получить меню с подменю и блюдами",
+    response_model=MenuTree,
+)
+async def get_menu_tree(
+    menu_id: UUID4,
+    service: MenuCRUDService = Depends(get_menu_service),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.tree_response(menu_id, if_none_match)
 
 
 @router.get(
@@ -23,8 +56,9 @@ async def list_menu(
 async def get_menu(
     menu_id: UUID4,
     crud_service: MenuCRUDService = Depends(get_menu_service),
-) -> MenuRead:
-    return await crud_service.get(menu_id)
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await crud_service.get_response(menu_id, if_none_match)
 
 
 @router.post(
@@ -37,8 +71,7 @@ async def add_menu(
     item_create: MenuCreate,
     crud_service: MenuCRUDService = Depends(get_menu_service),
 ) -> MenuRead:
-    obj = await crud_service.create(item_create)
-    return await crud_service.get(obj.id)
+    return await crud_service.create(item_create)
 
 
 @router.patch("/{menu_id}", summary="Изменить меню", response_model=MenuRead)
@@ -1,14 +1,19 @@
 import os.path
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse, JSONResponse
-from sqlmodel.ext.asyncio.session import AsyncSession
+from aioredis import Redis
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic.types import UUID4
 
-from app.core.config import ExcelStyle, settings
-from app.db.database import get_session
+from app.core.config import ExcelStyle
+from app.db.cache import get_cache
 from app.db.models import TaskDataResponse
-from app.services.reports import get_menus_report_data
-from app.tasks.tasks import generate_menu_xlsx, get_task_info
+from app.services.report_registry import (
+    report_events,
+    report_path,
+    request_menus_report,
+)
+from app.services.reports import report_status
 
 router = APIRouter()
 
@@ -19,13 +24,11 @@ router = APIRouter()
     response_model=TaskDataResponse,
     summary="Сформировать Excel файл меню",
 )
-async def generate_menus_report(
-    db_session: AsyncSession = Depends(get_session),
-) -> JSONResponse:
-    menus_data = await get_menus_report_data(db_session)
-    task_id = generate_menu_xlsx.delay(menus_data)
+async def generate_menus_report(cache: Redis = Depends(get_cache)) -> JSONResponse:
+    task_info, ready = await request_menus_report(cache)
     return JSONResponse(
-        content=get_task_info(task_id), status_code=status.HTTP_202_ACCEPTED
+        content=task_info,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_202_ACCEPTED,
     )
 
 
@@ -34,10 +37,12 @@ async def generate_menus_report(
     summary="Скачать Excel файл меню",
     responses={status.HTTP_425_TOO_EARLY: {"model": TaskDataResponse}},
 )
-async def get_menus_report(task_id: str) -> FileResponse:
-    task_data = get_task_info(task_id)
-    if task_data.get("task_result"):
-        path = os.path.join(settings.FILES_DIR, f"{task_id}.xlsx")
+async def get_menus_report(
+    task_id: UUID4,
+    cache: Redis = Depends(get_cache),
+) -> FileResponse:
+    path = report_path(str(task_id))
+    if os.path.exists(path):
         return FileResponse(
             path=path,
             filename="Menu.xlsx",
@@ -46,5 +51,26 @@ async def get_menus_report(task_id: str) -> FileResponse:
     else:
         raise HTTPException(
             status_code=status.HTTP_425_TOO_EARLY,
-            detail=task_data,
+            detail=await report_status(cache, str(task_id)),
         )
+
+
+@router.get(
+    "/menus/{task_id}/events",
+    summary="Получить события статуса Excel файла меню",
+    response_class=StreamingResponse,
+)
+async def get_menus_report_events(
+    task_id: UUID4,
+    request: Request,
+    cache: Redis = Depends(get_cache),
+) -> StreamingResponse:
+    return StreamingResponse(
+        report_events(
+            cache,
+            str(task_id),
+            request.url_for("get_menus_report", task_id=str(task_id)),
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+
+from app.db.cache import get_local_cache
+from app.db.database import get_pool_stats
+from app.db.local_cache import LocalCache
+from app.services.warm_up import is_ready
+
+router = APIRouter()
+
+
+@router.get("/db_pool", summary="Получить статистику пула соединений БД")
+async def db_pool_stats() -> dict:
+    return get_pool_stats()
+
+
+@router.get("/local_cache", summary="Получить статистику локального кэша")
+async def local_cache_stats(
+    local_cache: LocalCache | None = Depends(get_local_cache),
+) -> dict:
+    return local_cache.stats() if local_cache else {}
+
+
+@router.get("/ready", summary="Проверить готовность приложения")
+async def readiness() -> JSONResponse:
+    ready = is_ready()
+    return JSONResponse(
+        content={"ready": ready},
+        status_code=status.HTTP_200_OK
+        if ready
+        else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 from fastapi.responses import JSONResponse
 from pydantic.types import UUID4
 
-from app.db.models import Menu, SubmenuCreate, SubmenuRead, SubmenuUpdate
-from app.services.dependencies import validate_menu_model
+from app.core.config import settings
+from app.db.models import SubmenuCreate, SubmenuRead, SubmenuUpdate
+from app.services.dependencies import validate_submenu_path
 from app.services.submenu import SubmenuCRUDService, get_submenu_service
 
 router = APIRouter()
@@ -16,9 +17,16 @@ router = APIRouter()
 )
 async def list_submenu(
     service: SubmenuCRUDService = Depends(get_submenu_service),
-    menu: Menu = Depends(validate_menu_model),
-) -> list[SubmenuRead]:
-    return await service.list(menu_id=menu.id)
+    parent_ids: dict = Depends(validate_submenu_path),
+    cursor: str | None = None,
+    limit: int = Query(
+        default=settings.PAGE_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.PAGE_MAX_LIMIT,
+    ),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.list_response(cursor, limit, if_none_match, **parent_ids)
 
 
 @router.get(
@@ -29,8 +37,10 @@ async def list_submenu(
 async def get_submenu(
     item_id: UUID4,
     service: SubmenuCRUDService = Depends(get_submenu_service),
-) -> SubmenuRead:
-    return await service.get(item_id)
+    parent_ids: dict = Depends(validate_submenu_path),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    return await service.get_response(item_id, if_none_match, **parent_ids)
 
 
 @router.post(
@@ -42,9 +52,9 @@ async def get_submenu(
 async def add_submenu(
     item_create: SubmenuCreate,
     service: SubmenuCRUDService = Depends(get_submenu_service),
-    menu: Menu = Depends(validate_menu_model),
+    parent_ids: dict = Depends(validate_submenu_path),
 ) -> SubmenuRead:
-    return await service.create(item_create, menu_id=menu.id)
+    return await service.create(item_create, **parent_ids)
 
 
 @router.patch(
@@ -56,14 +66,15 @@ async def update_submenu(
     item_id: UUID4,
     item_update: SubmenuUpdate,
     service: SubmenuCRUDService = Depends(get_submenu_service),
+    parent_ids: dict = Depends(validate_submenu_path),
 ) -> SubmenuRead:
-    return await service.update(item_id, item_update)
+    return await service.update(item_id, item_update, **parent_ids)
 
 
 @router.delete("/{item_id}", summary="Удалить подменю")
 async def delete_submenu(
     item_id: UUID4,
     service: SubmenuCRUDService = Depends(get_submenu_service),
-    menu: Menu = Depends(validate_menu_model),
+    parent_ids: dict = Depends(validate_submenu_path),
 ) -> JSONResponse:
-    return await service.delete(item_id, menu_id=menu.id)
+    return await service.delete(item_id, **parent_ids)
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+
+from app.db.cache import close_cache, get_cache
+from app.db.database import async_session
+from app.services.base_cache_service import BaseCacheService
+from app.services.counters import check_counters, invalidate_counters, repair_counters
+from app.services.load_data import DB_DATA_PATH, load_json_data
+from app.services.warm_up import warm_up_cache
+
+
+async def counters_command(repair: bool) -> None:
+    """
+    The counters_command function prints menus and submenus with drifted
+    denormalized counters and recalculates them if repair is requested.
+    Cached objects with repaired counters are removed from the cache.
+    """
+    async with async_session() as session:
+        drift = await check_counters(session)
+        for table, rows in drift.items():
+            for row in rows:
+                print(f"{table}: {row}")
+        print(
+            f"Found {len(drift['menus'])} menus and "
+            f"{len(drift['submenus'])} submenus with drifted counters"
+        )
+        if repair:
+            drift = await repair_counters(session)
+            await invalidate_counters(BaseCacheService(await get_cache()), drift)
+            await close_cache()
+            print("Counters repaired")
+
+
+async def warm_up_command() -> None:
+    """
+    The warm_up_command function preloads menus, submenus and dishes into
+    the cache.
+    """
+    async with async_session() as session:
+        counts = await warm_up_cache(session, BaseCacheService(await get_cache()))
+    await close_cache()
+    print(
+        f"Cached {counts['menus']} menus, {counts['submenus']} submenus "
+        f"and {counts['dishes']} dishes"
+    )
+
+
+async def load_data_command(path: str) -> None:
+    """
+    The load_data_command function imports the catalog of menus with nested
+    submenus and dishes from the JSON file.
+    """
+    async with async_session() as session:
+        counts = await load_json_data(
+            session,
+            BaseCacheService(await get_cache()),
+            path,
+        )
+    await close_cache()
+    print(
+        f"Imported {counts['menus']} menus, {counts['submenus']} submenus "
+        f"and {counts['dishes']} dishes"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Project management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    counters_parser = commands.add_parser(
+        "check_counters",
+        help="Check menus and submenus counters consistency",
+    )
+    counters_parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Recalculate drifted counters",
+    )
+
+    commands.add_parser("warm_up_cache", help="Preload the cache")
+
+    load_data_parser = commands.add_parser(
+        "load_data",
+        help="Import menus, submenus and dishes from a JSON file",
+    )
+    load_data_parser.add_argument(
+        "path",
+        nargs="?",
+        default=DB_DATA_PATH,
+        help="Path to the JSON catalog",
+    )
+
+    args = parser.parse_args()
+    if args.command == "check_counters":
+        asyncio.run(counters_command(args.repair))
+    elif args.command == "warm_up_cache":
+        asyncio.run(warm_up_command())
+    elif args.command == "load_data":
+        asyncio.run(load_data_command(args.path))
+
+
+if __name__ == "__main__":
+    main()
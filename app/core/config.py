@@ -32,17 +32,63 @@ class Settings(BaseSettings):
         port=PG_DB_PORT,
         path=f"/{PG_DB_NAME}",
     )
+    PG_POOL_SIZE: int = 10
+    PG_MAX_OVERFLOW: int = 10
+    PG_POOL_TIMEOUT: float = 30
+    PG_POOL_RECYCLE: int = 1800
+    PG_POOL_PRE_PING: bool = True
+    PG_STATEMENT_CACHE_SIZE: int = 500
 
     # Redis settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", default="localhost")
     REDIS_PORT: str = os.getenv("REDIS_PORT", default="6379")
-    REDIS_CACHE_TIME: str | int = os.getenv("REDIS_CACHE_TIME", default=3600)
+    REDIS_CACHE_TIME: int = 3600
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
     REDIS_URL: str = RedisDsn.build(
         scheme="redis",
         host=REDIS_HOST,
         port=REDIS_PORT,
     )
 
+    # Cache values serialization settings
+    CACHE_CODEC: str = os.getenv("CACHE_CODEC", default="orjson")
+    CACHE_COMPRESSION: str | None = None
+    CACHE_COMPRESSION_THRESHOLD: int = 4096
+
+    # In-process cache settings
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAXSIZE: int = 10000
+    CACHE_LOCAL_TTL: float = 5
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+
+    # Cache stampede protection settings
+    CACHE_EARLY_EXPIRATION_BETA: float = 1.0
+    CACHE_LOCK_ENABLED: bool = False
+    CACHE_LOCK_TIMEOUT: float = 10
+    CACHE_LOCK_WAIT: float = 1
+    CACHE_WRITE_THROUGH: bool = False
+
+    # Preload the cache at startup, the app is not ready until it is finished
+    CACHE_WARM_UP_ON_STARTUP: bool = False
+
+    # Keyset pagination of lists
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 100
+
+    # Bulk import of catalogs, rows per executemany batch
+    IMPORT_BATCH_SIZE: int = 10000
+
+    # Negative cache of not found objects ids
+    CACHE_NEGATIVE_TTL: int = 30
+
+    # Stale-while-revalidate soft TTL of services cache (disabled if empty)
+    MENU_CACHE_SOFT_TTL: int | None = None
+    SUBMENU_CACHE_SOFT_TTL: int | None = None
+    DISH_CACHE_SOFT_TTL: int | None = None
+
     # RabbitMQ settings
     RABBITMQ_HOST: str = os.getenv("RABBITMQ_HOST", default="localhost")
     RABBITMQ_PORT: str = os.getenv("RABBITMQ_PORT", default="5672")
@@ -62,6 +108,22 @@ class Settings(BaseSettings):
     )
     CELERY_BACKEND_URL: str = "rpc://"
 
+    # Reports of an unchanged catalog are reused for REPORT_CACHE_TIME seconds
+    REPORT_CACHE_TIME: int = 86400
+
+    # Report tasks are killed and replaced after REPORT_TASK_TIMEOUT seconds
+    REPORT_TASK_TIMEOUT: int = 600
+
+    # Report task status events: backend lookup interval and stream timeout
+    REPORT_EVENTS_INTERVAL: float = 1
+    REPORT_EVENTS_TIMEOUT: float = 300
+
+    # Report rows are fetched from the database in batches of this size
+    REPORT_STREAM_BATCH_SIZE: int = 1000
+
+    # Stream reports with a write-only workbook, rows are not kept in memory
+    REPORT_XLSX_WRITE_ONLY: bool = True
+
 
 class ExcelStyle:
     """Styles for Excel file report."""
@@ -94,5 +156,13 @@ class ExcelStyle:
     Base.border = AllBorder
     Base.alignment = Alignment(wrap_text=True)
 
+    FilledHeader = NamedStyle(name="filled_header")
+    FilledHeader.font = Font(size=12, bold=True)
+    FilledHeader.border = AllBorder
+    FilledHeader.alignment = Alignment(wrap_text=True)
+    FilledHeader.fill = GreyFill
+
+    ColumnWidths = {"A": 5, "B": 15, "C": 35, "D": 35, "E": 70, "F": 10}
+
 
 settings = Settings()
@@ -1,18 +1,137 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import aioredis
-from aioredis import Redis
+from aioredis import ConnectionPool, Redis
 
 from app.core.config import settings
+from app.db.local_cache import LocalCache
 
+logger = logging.getLogger(__name__)
 
-async def get_cache() -> Redis:
+NODE_ID: str = uuid.uuid4().hex
+
+redis_pool: ConnectionPool | None = None
+local_cache: LocalCache | None = (
+    LocalCache(maxsize=settings.CACHE_LOCAL_MAXSIZE, ttl=settings.CACHE_LOCAL_TTL)
+    if settings.CACHE_LOCAL_ENABLED
+    else None
+)
+invalidation_listener: asyncio.Task | None = None
+
+
+def create_cache_pool() -> ConnectionPool:
     """
-    The get_cache function creates a Redis connection pool using the REDIS_URL
-    from the settings file.
+    The create_cache_pool function creates a process-wide Redis connection pool
+    using the REDIS_URL and pool settings from the settings file.
     """
-    redis = aioredis.from_url(
+    return aioredis.ConnectionPool.from_url(
         settings.REDIS_URL,
-        max_connections=10,
-        encoding="utf8",
-        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
     )
-    return redis
+
+
+async def open_cache() -> None:
+    """
+    The open_cache function initializes the shared Redis connection pool.
+    It is called once on application startup.
+    """
+    global redis_pool, invalidation_listener
+    if redis_pool is None:
+        redis_pool = create_cache_pool()
+    if local_cache is not None and invalidation_listener is None:
+        invalidation_listener = asyncio.create_task(
+            listen_invalidations(local_cache),
+        )
+
+
+async def close_cache() -> None:
+    """
+    The close_cache function disconnects all connections of the shared Redis
+    connection pool. It is called once on application shutdown.
+    """
+    global redis_pool, invalidation_listener
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+        invalidation_listener = None
+    if redis_pool is not None:
+        await redis_pool.disconnect()
+        redis_pool = None
+
+
+async def get_cache() -> Redis:
+    """
+    The get_cache function returns a Redis client bound to the shared
+    connection pool. The pool is created lazily if the application startup
+    hook has not been run (e.g. in scripts).
+    """
+    if redis_pool is None:
+        await open_cache()
+    return Redis(connection_pool=redis_pool)
+
+
+@asynccontextmanager
+async def task_cache() -> AsyncIterator[Redis]:
+    """
+    The task_cache function yields a Redis client with its own connection
+    pool for background tasks. Celery tasks run coroutines in a new event
+    loop each, the shared pool cannot be used there.
+    """
+    cache = aioredis.from_url(settings.REDIS_URL)
+    try:
+        yield cache
+    finally:
+        await cache.close()
+
+
+async def get_local_cache() -> LocalCache | None:
+    """
+    The get_local_cache function returns the process-wide in-process cache,
+    or None if it is disabled in settings.
+    """
+    return local_cache
+
+
+def apply_invalidation(local_cache: LocalCache, message: str) -> None:
+    """
+    The apply_invalidation function removes keys listed in an invalidation
+    message of another node from the in-process cache.
+    """
+    data = json.loads(message)
+    if data["node"] != NODE_ID:
+        local_cache.delete(*data["keys"])
+
+
+async def listen_invalidations(local_cache: LocalCache) -> None:
+    """
+    The listen_invalidations function removes keys changed by other nodes
+    from the in-process cache. Nodes broadcast changed keys over Redis
+    pub/sub. The in-process cache is cleared after (re)subscribing, as
+    messages could be missed while the node was disconnected.
+    """
+    while True:
+        pubsub = Redis(connection_pool=redis_pool).pubsub()
+        try:
+            await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+            local_cache.clear()
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0,
+                )
+                if message is not None:
+                    apply_invalidation(local_cache, message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed, reconnecting")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.close()
@@ -1,24 +1,102 @@
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import cast
+
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 
-engine = create_async_engine(settings.POSTGRES_URL, future=True)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts: int = 0
+        self.wait_time_total: float = 0.0
+        self.wait_time_max: float = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+
+engine = create_async_engine(
+    settings.POSTGRES_URL,
+    future=True,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.PG_POOL_SIZE,
+    max_overflow=settings.PG_MAX_OVERFLOW,
+    pool_timeout=settings.PG_POOL_TIMEOUT,
+    pool_recycle=settings.PG_POOL_RECYCLE,
+    pool_pre_ping=settings.PG_POOL_PRE_PING,
+    connect_args={
+        "prepared_statement_cache_size": settings.PG_STATEMENT_CACHE_SIZE,
+    },
+)
+async_session = sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 async def get_session() -> AsyncSession:
     """
-    The get_session function is a factory function that creates an instance
-    of the AsyncSession class. The AsyncSession class inherits from the Session
-    class and adds functionality to it. This allows us to use async with
-    statements in order to create asynchronous sessions, which are used by our
-    database models.
+    The get_session function is a dependency function that yields an instance
+    of the AsyncSession class from the module-level session factory, so all
+    requests share the engine connection pool.
     """
-    async_session = sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
     async with async_session() as session:
         yield session
+
+
+@asynccontextmanager
+async def task_session() -> AsyncIterator[AsyncSession]:
+    """
+    The task_session function yields a session of a new engine without a
+    connection pool for background tasks. Celery tasks run coroutines in a
+    new event loop each, pooled connections cannot be shared between loops.
+    Reads of the session see one snapshot of the database (REPEATABLE READ).
+    """
+    task_engine = create_async_engine(
+        settings.POSTGRES_URL,
+        future=True,
+        poolclass=NullPool,
+        isolation_level="REPEATABLE READ",
+    )
+    try:
+        async with AsyncSession(task_engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        await task_engine.dispose()
+
+
+def get_pool_stats() -> dict:
+    """
+    The get_pool_stats function returns the current state of the engine
+    connection pool: its size, checked in/out and overflow connections and
+    the time spent waiting for a connection.
+    """
+    pool = cast(InstrumentedQueuePool, engine.sync_engine.pool)
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": pool.checkouts,
+        "wait_time_avg": pool.wait_time_total / pool.checkouts
+        if pool.checkouts
+        else 0.0,
+        "wait_time_max": pool.wait_time_max,
+    }
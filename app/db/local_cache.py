@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class LocalCache:
+    """
+    In-process LRU cache with a per-entry TTL. It sits in front of Redis, so
+    the TTL bounds how stale an entry can be if an invalidation is missed.
+    """
+
+    maxsize: int
+    ttl: float
+    storage: OrderedDict = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+    def get(self, key: str) -> Any | None:
+        """Gets an object from the cache and marks it as recently used."""
+        entry = self.storage.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self.storage[key]
+            self.misses += 1
+            return None
+        self.storage.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Sets an object to the cache evicting least recently used ones."""
+        self.storage[key] = (time.monotonic() + self.ttl, value)
+        self.storage.move_to_end(key)
+        while len(self.storage) > self.maxsize:
+            self.storage.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        """Removes objects from the cache."""
+        for key in keys:
+            self.storage.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes all objects from the cache."""
+        self.storage.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache size and hit statistics."""
+        return {
+            "size": len(self.storage),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
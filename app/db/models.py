@@ -1,7 +1,10 @@
+import datetime
 import uuid
 
 from pydantic.types import UUID4, condecimal
+from sqlalchemy import Column, ForeignKey, Index, func
 from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel.sql.sqltypes import GUID
 
 
 class DefaultBase(SQLModel):
@@ -22,6 +25,19 @@ class DefaultUUIDBase(DefaultBase):
     )
 
 
+class DefaultTableBase(DefaultUUIDBase):
+    """
+    Base table class for menus and dishes. Lists are ordered by the creation
+    time and id.
+    """
+
+    created_at: datetime.datetime = Field(
+        default_factory=datetime.datetime.utcnow,
+        nullable=False,
+        sa_column_kwargs={"server_default": func.now()},
+    )
+
+
 class DefaultModelBase(DefaultBase):
     """Base model class for menus and dishes."""
 
@@ -48,12 +64,24 @@ class DefaultUpdateBase(DefaultBase):
     description: str | None
 
 
-class Menu(DefaultUUIDBase, DefaultModelBase, table=True):  # type: ignore
+class Menu(DefaultTableBase, DefaultModelBase, table=True):  # type: ignore
     """Menu model class."""
 
+    __table_args__ = (Index("ix_menu_created_at_id", "created_at", "id"),)
+
+    submenus_count: int = Field(
+        default=0,
+        nullable=False,
+        sa_column_kwargs={"server_default": "0"},
+    )
+    dishes_count: int = Field(
+        default=0,
+        nullable=False,
+        sa_column_kwargs={"server_default": "0"},
+    )
     submenus: list["Submenu"] = Relationship(
         back_populates="menu",
-        sa_relationship_kwargs={"cascade": "all,delete", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all,delete", "passive_deletes": True},
     )
 
 
@@ -88,14 +116,30 @@ class MenuUpdate(DefaultUpdateBase):
         }
 
 
-class Submenu(DefaultUUIDBase, DefaultModelBase, table=True):  # type: ignore
+class Submenu(DefaultTableBase, DefaultModelBase, table=True):  # type: ignore
     """Submenu model class."""
 
-    menu_id: UUID4 = Field(foreign_key="menu.id", nullable=False, index=True)
+    __table_args__ = (
+        Index("ix_submenu_menu_id_created_at_id", "menu_id", "created_at", "id"),
+    )
+
+    menu_id: UUID4 = Field(
+        sa_column=Column(
+            GUID(),
+            ForeignKey("menu.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+    dishes_count: int = Field(
+        default=0,
+        nullable=False,
+        sa_column_kwargs={"server_default": "0"},
+    )
     menu: Menu = Relationship(back_populates="submenus")
     dishes: list["Dish"] = Relationship(
         back_populates="submenu",
-        sa_relationship_kwargs={"cascade": "all,delete", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all,delete", "passive_deletes": True},
     )
 
 
@@ -129,14 +173,21 @@ class SubmenuUpdate(DefaultUpdateBase):
         }
 
 
-class Dish(DefaultUUIDBase, DefaultModelBase, table=True):
+class Dish(DefaultTableBase, DefaultModelBase, table=True):
     """Dish model class."""
 
+    __table_args__ = (
+        Index("ix_dish_submenu_id_created_at_id", "submenu_id", "created_at", "id"),
+    )
+
     price: condecimal(decimal_places=2) = Field(default=None)  # type: ignore
     submenu_id: UUID4 = Field(
-        foreign_key="submenu.id",
-        nullable=False,
-        index=True,
+        sa_column=Column(
+            GUID(),
+            ForeignKey("submenu.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
     )
     submenu: Submenu = Relationship(back_populates="dishes")
 
@@ -176,6 +227,18 @@ class DishUpdate(DefaultUpdateBase):
         }
 
 
+class SubmenuTree(SubmenuRead):
+    """Submenu read class with nested dishes."""
+
+    dishes: list[DishRead] = []
+
+
+class MenuTree(MenuRead):
+    """Menu read class with nested submenus and dishes."""
+
+    submenus: list[SubmenuTree] = []
+
+
 class TaskDataResponse(SQLModel):
     """Task data info response model."""
 
@@ -2,7 +2,22 @@ from fastapi import FastAPI
 
 from app.api.api_v1 import api_v1
 from app.core.config import settings
+from app.db.cache import close_cache, get_cache, get_local_cache, open_cache
+from app.services.base_cache_service import BaseCacheService
+from app.services.warm_up import start_warm_up
 
 app = FastAPI(title=settings.PROJECT_NAME, docs_url="/")
 
 app.include_router(api_v1.router, prefix=settings.API_V1_STR)
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    await open_cache()
+    if settings.CACHE_WARM_UP_ON_STARTUP:
+        start_warm_up(BaseCacheService(await get_cache(), await get_local_cache()))
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await close_cache()
@@ -1,29 +1,358 @@
+import asyncio
 import json
-from dataclasses import dataclass
+import math
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from typing import Any
 
 from aioredis import Redis
-from fastapi.encoders import jsonable_encoder
+from aioredis.client import Pipeline
+from aioredis.exceptions import WatchError
 
 from app.core.config import settings
+from app.db.cache import NODE_ID
+from app.db.local_cache import LocalCache
+from app.services.cache_codecs import CacheCodec, cache_codec
+from app.services.cache_keys import is_response_key, response_key
+
+# Deletes the key only if it still holds the value, e.g. the lock token.
+COMPARE_AND_DELETE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with the time it took to load and its expiration time."""
+
+    value: Any
+    delta: float
+    expires: float
+    stored: float = 0.0
+
+    def age(self) -> float:
+        """Returns the number of seconds since the entry was stored."""
+        return time.time() - self.stored
+
+    def should_refresh(self, beta: float) -> bool:
+        """
+        Probabilistic early expiration (XFetch): the closer the entry is to
+        expiration and the longer it takes to load, the more likely a reader
+        refreshes it before it expires for everybody at once.
+        """
+        if beta <= 0 or self.delta <= 0:
+            return False
+        gap = -self.delta * beta * math.log(1.0 - random.random())
+        return time.time() + gap >= self.expires
 
 
 @dataclass
 class BaseCacheService:
-    """Base service for a Redis-based cache."""
+    """
+    Base service for a Redis-based cache with an optional in-process cache
+    in front of it. Changed keys are broadcast over Redis pub/sub, so other
+    nodes remove them from their in-process caches. Values are serialized
+    with the configured cache codec.
+    """
 
     cache: Redis
+    local_cache: LocalCache | None = None
+    codec: CacheCodec = field(default_factory=lambda: cache_codec)
+
+    def envelope(
+        self,
+        value: Any,
+        delta: float = 0.0,
+        ttl: int | None = None,
+    ) -> bytes:
+        """
+        Encodes the value with the time it took to load it and its expiration
+        time.
+        """
+        now = time.time()
+        return self.codec.encode(
+            {
+                "value": value,
+                "delta": delta,
+                "expires": now + (ttl or settings.REDIS_CACHE_TIME),
+                "stored": now,
+            }
+        )
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str] = (),
+        delta: float = 0.0,
+        ttl: int | None = None,
+    ):
+        """
+        Sets an object to the cache. The key is added to the given tags, so
+        it can be removed with invalidate_tags. Delta is the time it took to
+        load the object, it is used for early expiration. The object expires
+        after ttl seconds, REDIS_CACHE_TIME by default.
+        """
+        await self.write({key: value}, tags=tags, delta=delta, ttl=ttl)
+
+    async def set_many(
+        self,
+        values: dict[str, Any],
+        tags: Iterable[str] = (),
+        delta: float = 0.0,
+    ):
+        """Sets several objects to the cache in one round-trip."""
+        await self.write(values, tags=tags, delta=delta)
+
+    async def set_groups(
+        self,
+        groups: dict[tuple[str, ...], dict[str, Any]],
+        nx: bool = False,
+        unchanged: dict[str, bytes] | None = None,
+    ) -> bool:
+        """
+        Sets groups of objects to the cache in one round-trip, keys of every
+        group are added to the group tags. If nx, only missing keys are set,
+        cached values are kept. If unchanged keys are given, nothing is set
+        unless they still hold the given values, they are watched in a
+        WATCH/MULTI transaction. Returns whether the objects were set.
+        """
+        encoded_groups = {
+            tags: {key: self.envelope(value) for key, value in values.items()}
+            for tags, values in groups.items()
+        }
+        if not unchanged:
+            pipe = self.cache.pipeline(transaction=False)
+            for tags, encoded in encoded_groups.items():
+                self.queue_write(pipe, encoded, [], tags, nx=nx)
+            await pipe.execute()
+            return True
+        keys = list(unchanged)
+        try:
+            async with self.cache.pipeline(transaction=True) as pipe:
+                await pipe.watch(*keys)
+                if await pipe.mget(keys) != list(unchanged.values()):
+                    return False
+                pipe.multi()
+                for tags, encoded in encoded_groups.items():
+                    self.queue_write(pipe, encoded, [], tags, nx=nx)
+                await pipe.execute()
+        except WatchError:
+            return False
+        return True
 
-    async def set(self, key: str, value: Any):
-        """Sets an object to the cache."""
-        value = json.dumps(jsonable_encoder(value))
-        await self.cache.set(key, value, ex=settings.REDIS_CACHE_TIME)
+    async def write(
+        self,
+        values: dict[str, Any] | None = None,
+        deleted: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        delta: float = 0.0,
+        ttl: int | None = None,
+    ):
+        """
+        Removes the deleted keys and sets the values to the cache in one
+        pipelined round-trip. Set keys are added to the given tags. All
+        changed keys are broadcast to the in-process caches of other nodes
+        in the same round-trip. Encoded responses of all changed keys are
+        removed too.
+        """
+        encoded = {
+            key: self.envelope(value, delta, ttl)
+            for key, value in (values or {}).items()
+        }
+        deleted = list(deleted)
+        pipe = self.cache.pipeline(transaction=False)
+        self.queue_write(pipe, encoded, deleted, tags, ttl)
+        results = await pipe.execute()
+        return results[0] if deleted else 0
+
+    def queue_write(
+        self,
+        pipe: Pipeline,
+        encoded: dict[str, bytes],
+        deleted: list[str],
+        tags: Iterable[str] = (),
+        ttl: int | None = None,
+        nx: bool = False,
+    ) -> None:
+        """
+        Queues removal of the deleted keys and setting of the encoded values
+        to the pipeline, see write. The in-process cache is updated right
+        away. If nx, only missing keys are set, so the set values are neither
+        put to the in-process cache nor broadcast.
+        """
+        deleted = deleted + [
+            response_key(key)
+            for key in [*deleted, *encoded]
+            if not is_response_key(key)
+        ]
+        ttl = ttl or settings.REDIS_CACHE_TIME
+        if deleted:
+            pipe.unlink(*deleted)
+        for key, data in encoded.items():
+            pipe.set(key, data, ex=ttl, nx=nx)
+        if encoded:
+            for tag in tags:
+                pipe.sadd(tag, *encoded)
+                pipe.expire(tag, ttl)
+        if self.local_cache is not None:
+            self.local_cache.delete(*deleted)
+            changed = [*deleted]
+            if not nx:
+                for key, data in encoded.items():
+                    self.local_cache.set(key, CacheEntry(**self.codec.decode(data)))
+                changed.extend(encoded)
+            pipe.publish(
+                settings.CACHE_INVALIDATION_CHANNEL,
+                self.invalidation_message(*changed),
+            )
+
+    async def write_through(
+        self,
+        changes: dict[str, Callable[[Any], Any]],
+        values: dict[str, Any] | None = None,
+        deleted: Iterable[str] = (),
+        tags: Iterable[str] = (),
+    ) -> bool:
+        """
+        Patches cached values of the keys in place with their change
+        functions, keys missed in the cache are skipped, their encoded
+        responses are removed. The values are set
+        and the deleted keys are removed in the same WATCH/MULTI transaction.
+        If any patched key is changed concurrently, the patched keys are
+        removed instead. Returns whether the keys were patched. Without
+        changes the values are written as usual, see write.
+        """
+        values = values or {}
+        deleted = list(deleted)
+        keys = list(changes)
+        if not keys:
+            await self.write(values, deleted=deleted, tags=tags)
+            return True
+        try:
+            async with self.cache.pipeline(transaction=True) as pipe:
+                await pipe.watch(*keys)
+                patched = {}
+                for key, data in zip(keys, await pipe.mget(keys)):
+                    if not data:
+                        continue
+                    entry = CacheEntry(**self.codec.decode(data))
+                    patched[key] = self.envelope(
+                        changes[key](entry.value),
+                        entry.delta,
+                    )
+                pipe.multi()
+                # Responses of missed keys may outlive them, they are removed.
+                missed = [response_key(key) for key in keys if key not in patched]
+                self.queue_write(pipe, patched, [*deleted, *missed])
+                self.queue_write(
+                    pipe,
+                    {key: self.envelope(value) for key, value in values.items()},
+                    [],
+                    tags,
+                )
+                await pipe.execute()
+        except WatchError:
+            await self.write(values, deleted=[*deleted, *keys], tags=tags)
+            return False
+        return True
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        """Gets a cache entry from the in-process cache or Redis."""
+        return (await self.get_entries(key))[0]
+
+    async def get_entries(self, *keys: str) -> list[CacheEntry | None]:
+        """
+        Gets cache entries of the keys from the in-process cache, the missed
+        ones are fetched from Redis with a single MGET.
+        """
+        entries: dict[str, CacheEntry | None] = {key: None for key in keys}
+        if self.local_cache is not None:
+            for key in keys:
+                entries[key] = self.local_cache.get(key)
+        missed = [key for key, entry in entries.items() if entry is None]
+        if missed:
+            for key, data in zip(missed, await self.cache.mget(missed)):
+                if not data:
+                    continue
+                entries[key] = CacheEntry(**self.codec.decode(data))
+                if self.local_cache is not None:
+                    self.local_cache.set(key, entries[key])
+        return [entries[key] for key in keys]
 
     async def get(self, key: str):
         """Gets an object from the cache."""
-        data = await self.cache.get(key)
-        return json.loads(data) if data else None
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def get_many(self, *keys: str) -> list[Any]:
+        """Gets objects of the keys from the cache, None for missed keys."""
+        return [
+            entry.value if entry else None for entry in await self.get_entries(*keys)
+        ]
+
+    async def delete(self, *keys: str):
+        """
+        Removes objects from the cache. Keys are unlinked, so Redis reclaims
+        their memory in a background thread.
+        """
+        return await self.write(deleted=keys)
+
+    async def tags_members(self, *tags: str) -> list[str]:
+        """Returns keys of all objects of the given tags."""
+        groups = await self.tags_members_groups(*tags)
+        return [key for group in groups for key in group]
+
+    async def tags_members_groups(self, *tags: str) -> list[list[str]]:
+        """Returns keys of objects of every given tag in one round-trip."""
+        pipe = self.cache.pipeline(transaction=False)
+        for tag in tags:
+            pipe.smembers(tag)
+        members = await pipe.execute()
+        return [[key.decode() for key in tag_members] for tag_members in members]
+
+    async def invalidate_tags(self, *tags: str):
+        """Removes all objects of the given tags and tags themselves."""
+        return await self.delete(*tags, *await self.tags_members(*tags))
+
+    def invalidation_message(self, *keys: str) -> str:
+        """Returns the invalidation message of the changed keys."""
+        return json.dumps({"node": NODE_ID, "keys": keys})
 
-    async def delete(self, key: str):
-        """Removes an object from the cache."""
-        return await self.cache.delete(key)
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[bool]:
+        """
+        Distributed lock of the key across nodes. It waits up to
+        CACHE_LOCK_WAIT seconds for the lock and yields whether it was
+        acquired. The lock expires after CACHE_LOCK_TIMEOUT seconds if its
+        owner fails to release it. It is released atomically only if it is
+        still owned, so an expired lock taken by another node is kept.
+        """
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        acquired = False
+        while True:
+            acquired = bool(
+                await self.cache.set(
+                    lock_key,
+                    token,
+                    nx=True,
+                    px=int(settings.CACHE_LOCK_TIMEOUT * 1000),
+                )
+            )
+            if acquired or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(0.05)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await self.cache.eval(COMPARE_AND_DELETE_SCRIPT, 1, lock_key, token)
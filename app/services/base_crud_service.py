@@ -1,19 +1,39 @@
-from dataclasses import dataclass
-from typing import Generic, TypeVar
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Generic, TypeVar
 
+from fastapi import Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from pydantic.types import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.models import DefaultReadBase
 from app.services.base_cache_service import BaseCacheService
 from app.services.base_db_service import (
     BaseDbService,
+    Counters,
     CreateSchemaType,
-    ModelType,
     UpdateSchemaType,
 )
+from app.services.cache_keys import CATALOG_VERSION_KEY, CacheScope, response_key
+from app.services.pagination import Cursor, decode_cursor, encode_cursor
+from app.services.single_flight import single_flight
 
 ReadSchemaType = TypeVar("ReadSchemaType", bound=DefaultReadBase)
+Loader = Callable[[BaseDbService], Awaitable[Any]]
+
+logger = logging.getLogger(__name__)
+
+background_tasks: set[asyncio.Task] = set()
 
 
 @dataclass
@@ -23,80 +43,529 @@ class BaseCRUDService(
     cache: BaseCacheService
     db_service: BaseDbService
     read_model: type[ReadSchemaType]
-    items_cache_list: str
+    cache_scope: CacheScope
+    soft_ttl: int | None = None
+    session_factory: Callable[
+        [], AbstractAsyncContextManager[AsyncSession]
+    ] | None = None
 
-    def process_db_data(self, item: ModelType) -> ReadSchemaType:
+    def process_db_data(self, item: dict) -> ReadSchemaType:
         """
-        The process_db_data function takes in a ModelType object and returns
-        the data in that object as a dictionary. This function is used to
+        The process_db_data function takes in the read data of a ModelType
+        object and returns it as a read model. This function is used to
         convert the database data into JSON format.
         """
-        return self.read_model.parse_obj(item.dict())
+        return self.read_model.parse_obj(item)
+
+    def db_filters(self, **parent_ids: UUID4) -> dict:
+        """
+        The db_filters function returns the foreign key of the nearest parent
+        object from the path parent ids.
+        """
+        parent = self.cache_scope.parent
+        if parent is None:
+            return {}
+        return {parent.id_field: parent_ids[parent.id_field]}
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Loader,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        The get_or_load function returns the cached value of the key or loads
+        it with the loader function. Concurrent misses of the key in the
+        process await a single loader call. A cached value may be refreshed
+        before it expires (probabilistic early expiration), meanwhile other
+        readers keep getting the cached value.
+
+        If the service has soft_ttl, entries older than soft_ttl are returned
+        right away and refreshed in the background (stale-while-revalidate).
+        """
+        entry = await self.cache.get_entry(key)
+        if entry is not None:
+            if self.soft_ttl is not None and entry.age() > self.soft_ttl:
+                self.refresh_in_background(key, loader, tags)
+                return entry.value
+            if single_flight.in_flight(key) or not entry.should_refresh(
+                settings.CACHE_EARLY_EXPIRATION_BETA,
+            ):
+                return entry.value
+        return await single_flight.do(
+            key,
+            lambda: self.load(key, loader, tags),
+        )
+
+    def refresh_in_background(
+        self,
+        key: str,
+        loader: Loader,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """
+        The refresh_in_background function starts a task which reloads the
+        key with its own database session, as the request session is closed
+        once the response is sent.
+        """
+        session_factory = self.session_factory
+        if session_factory is None or single_flight.in_flight(key):
+            return
+        task = asyncio.create_task(
+            single_flight.do(
+                key,
+                partial(self.refresh, session_factory, key, loader, tags),
+            ),
+        )
+        background_tasks.add(task)
+        task.add_done_callback(self.refresh_done)
+
+    async def refresh(
+        self,
+        session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+        key: str,
+        loader: Loader,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """The refresh function reloads the key with a new database session."""
+        async with session_factory() as session:
+            db_service = replace(self.db_service, db_session=session)
+            return await self.load(key, loader, tags, db_service)
+
+    @staticmethod
+    def refresh_done(task: asyncio.Task) -> None:
+        """The refresh_done function logs failed background refreshes."""
+        background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background cache refresh failed: %r", task.exception())
+
+    async def load(
+        self,
+        key: str,
+        loader: Loader,
+        tags: Iterable[str] = (),
+        db_service: BaseDbService | None = None,
+    ) -> Any:
+        """
+        The load function loads the value with the loader function and sets
+        it to the cache. If CACHE_LOCK_ENABLED, only one node loads the key
+        at a time, others wait for the lock and take the loaded value from
+        the cache.
+        """
+        db_service = db_service or self.db_service
+        if not settings.CACHE_LOCK_ENABLED:
+            return await self.load_and_set(key, loader, tags, db_service)
+        async with self.cache.lock(key) as acquired:
+            if not acquired:
+                value = await self.cache.get(key)
+                if value is not None:
+                    return value
+            return await self.load_and_set(key, loader, tags, db_service)
+
+    async def load_and_set(
+        self,
+        key: str,
+        loader: Loader,
+        tags: Iterable[str],
+        db_service: BaseDbService,
+    ) -> Any:
+        """
+        The load_and_set function loads the value with the loader function
+        and sets it to the cache with the time it took to load.
+        """
+        start = time.perf_counter()
+        value = await loader(db_service)
+        delta = time.perf_counter() - start
+        await self.cache.set(key, value, tags=tags, delta=delta)
+        return value
+
+    async def load_page(
+        self,
+        db_service: BaseDbService,
+        after: Cursor | None,
+        limit: int,
+        **parent_ids: UUID4,
+    ) -> dict:
+        """
+        The load_page function loads a page of object items of the parent
+        object after the cursor key from the database, sets each of them to
+        the cache under its own key and returns their ids with the cursor of
+        the next page.
+        """
+        obj_list = await db_service.list_read(
+            after=after,
+            limit=limit + 1,
+            **self.db_filters(**parent_ids),
+        )
+        page = obj_list[:limit]
+        items = [self.process_db_data(item) for item in page]
+        await self.set_items(items, **parent_ids)
+        return {
+            "ids": [str(item.id) for item in items],
+            "next": encode_cursor(page[-1]) if len(obj_list) > limit else None,
+        }
+
+    async def load_items(
+        self,
+        ids: list[str],
+        **parent_ids: UUID4,
+    ) -> dict[str, ReadSchemaType]:
+        """
+        The load_items function loads the items missed in the cache from the
+        database in a single query and sets them to the cache.
+        """
+        obj_list = await self.db_service.list_read_by_ids(ids)
+        items = [self.process_db_data(item) for item in obj_list]
+        await self.set_items(items, **parent_ids)
+        return {str(item.id): item for item in items}
+
+    async def set_items(
+        self,
+        items: list[ReadSchemaType],
+        **parent_ids: UUID4,
+    ) -> None:
+        """The set_items function sets the items to the cache in one trip."""
+        if not items:
+            return
+        await self.cache.set_many(
+            {self.cache_scope.item_key(item.id): item for item in items},
+            tags=self.cache_scope.tree_tags(**parent_ids),
+        )
+
+    async def load_item(
+        self,
+        db_service: BaseDbService,
+        item_id: UUID4,
+    ) -> ReadSchemaType:
+        """The load_item function returns the item from the database."""
+        return self.process_db_data(await db_service.get_read(item_id))
+
+    def write_through_changes(
+        self,
+        counters: Counters,
+        **parent_ids: UUID4,
+    ) -> dict[str, Callable[[Any], Any]]:
+        """
+        The write_through_changes function returns change functions of the
+        cached parent objects, whose counters were changed by creation or
+        deletion of the item. The new counters returned by the database are
+        set, so a patch applied to an entry cached after the write does not
+        shift the counters twice.
+        """
+        return {
+            scope.item_key(parent_ids[scope.id_field]): partial(
+                self.set_counters,
+                counters[scope.name],
+            )
+            for scope in self.cache_scope.ancestors()
+            if scope.name in counters
+        }
+
+    @staticmethod
+    def set_counters(counters: dict[str, int], value: dict) -> dict:
+        """The set_counters function sets counters of the cached object."""
+        return {
+            **value,
+            **{field: count for field, count in counters.items() if field in value},
+        }
+
+    def page_tags(self, **parent_ids: UUID4) -> list[str]:
+        """
+        The page_tags function returns tags of cached pages of the list of
+        the parent object.
+        """
+        return [
+            *self.cache_scope.tree_tags(**parent_ids),
+            self.cache_scope.pages_tag(**parent_ids),
+        ]
+
+    async def changed_pages(
+        self,
+        **parent_ids: UUID4,
+    ) -> tuple[list[str], list[str]]:
+        """
+        The changed_pages function returns cached pages of the list of the
+        parent object and encoded pages of lists of all parent objects, whose
+        counters have changed.
+        """
+        pages, *ancestors_pages = await self.cache.tags_members_groups(
+            self.cache_scope.pages_tag(**parent_ids),
+            *self.cache_scope.ancestors_pages_tags(**parent_ids),
+        )
+        return pages, [response_key(key) for group in ancestors_pages for key in group]
 
-    async def list(self, **kwargs) -> list[ReadSchemaType]:
-        """The list function returns all object items from the database."""
-        items_list = await self.cache.get(self.items_cache_list)
-        if not items_list:
-            obj_list = await self.db_service.list(**kwargs)
-            items_list = [self.process_db_data(item) for item in obj_list]
-            await self.cache.set(self.items_cache_list, items_list)
-        return items_list
+    async def list(
+        self,
+        cursor: str | None = None,
+        limit: int | None = None,
+        **parent_ids: UUID4,
+    ) -> tuple[list[ReadSchemaType], str | None]:
+        """
+        The list function returns a page of object items of the parent object
+        after the cursor and the cursor of the next page, if there is one.
+        Ids of the page items are cached under the page key scoped by the
+        parent id, the items themselves are fetched from their own keys with
+        a single MGET. Items missed in the cache are loaded from the database
+        with a single query.
+        """
+        page_limit = limit or settings.PAGE_DEFAULT_LIMIT
+        after = decode_cursor(cursor) if cursor else None
+        page = await self.get_or_load(
+            self.cache_scope.page_key(cursor, page_limit, **parent_ids),
+            lambda db_service: self.load_page(
+                db_service,
+                after,
+                page_limit,
+                **parent_ids,
+            ),
+            tags=self.page_tags(**parent_ids),
+        )
+        ids = page["ids"]
+        items = dict(
+            zip(
+                ids,
+                await self.cache.get_many(*map(self.cache_scope.item_key, ids)),
+            )
+        )
+        missed = [item_id for item_id, item in items.items() if item is None]
+        if missed:
+            items.update(await self.load_items(missed, **parent_ids))
+        return [items[item_id] for item_id in ids if items[item_id] is not None], page[
+            "next"
+        ]
 
-    async def get(self, item_id: UUID4) -> ReadSchemaType:
+    async def get(self, item_id: UUID4, **parent_ids: UUID4) -> ReadSchemaType:
         """
         The get function is used to retrieve a single item. It takes an id as
         input and returns the corresponding object. If no such object exists,
-        it returns None.
+        it raises an HTTP 404 error.
         """
-        item = await self.cache.get(str(item_id))
-        if not item:
-            obj = await self.db_service.get(item_id)
-            item = self.process_db_data(obj)
-            await self.cache.set(str(item_id), item)
-        return item
+        return await self.get_or_load(
+            self.cache_scope.item_key(item_id),
+            lambda db_service: self.load_item(db_service, item_id),
+            tags=self.cache_scope.tree_tags(**parent_ids),
+        )
+
+    def render(self, value: Any, model: type[BaseModel] | None = None) -> bytes:
+        """
+        The render function validates the value with the response model, the
+        read model by default, and encodes it as FastAPI does with the
+        response model of the endpoint.
+        """
+        model = model or self.read_model
+        content: BaseModel | list[BaseModel]
+        if isinstance(value, list):
+            content = [model.validate(item) for item in value]
+        else:
+            content = model.validate(value)
+        return JSONResponse(content=None).render(jsonable_encoder(content))
+
+    @staticmethod
+    def etag_matches(etag: str, if_none_match: str | None) -> bool:
+        """
+        The etag_matches function checks the If-None-Match request header
+        against the ETag of the response.
+        """
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+
+    async def cached_response(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[tuple[Any, dict[str, str]]]],
+        tags: Iterable[str] = (),
+        if_none_match: str | None = None,
+        model: type[BaseModel] | None = None,
+    ) -> Response:
+        """
+        The cached_response function returns the encoded response body of the
+        cached value with a strong ETag, so cache hits skip validation and
+        serialization. The ETag is a hash of the body, it changes with the
+        object. Requests with a matching If-None-Match get 304 Not Modified.
+        The load function returns the value and its response headers, the
+        value is rendered with the model, see render.
+        """
+        cached = await self.cache.get(response_key(key))
+        if cached is None:
+            value, headers = await load()
+            body = self.render(value, model)
+            cached = {
+                "body": body.decode(),
+                "etag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+                "headers": headers,
+            }
+            await self.cache.set(response_key(key), cached, tags=tags)
+        headers = {**cached["headers"], "ETag": cached["etag"]}
+        if self.etag_matches(cached["etag"], if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            content=cached["body"],
+            media_type=JSONResponse.media_type,
+            headers=headers,
+        )
+
+    async def list_response(
+        self,
+        cursor: str | None = None,
+        limit: int | None = None,
+        if_none_match: str | None = None,
+        **parent_ids: UUID4,
+    ) -> Response:
+        """
+        The list_response function returns the encoded page of the parent
+        object items with the cursor of the next page in the X-Next-Cursor
+        header, see cached_response.
+        """
+        limit = limit or settings.PAGE_DEFAULT_LIMIT
+
+        async def load() -> tuple[list[ReadSchemaType], dict[str, str]]:
+            items, next_cursor = await self.list(cursor, limit, **parent_ids)
+            return items, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+        return await self.cached_response(
+            self.cache_scope.page_key(cursor, limit, **parent_ids),
+            load,
+            tags=self.cache_scope.tree_tags(**parent_ids),
+            if_none_match=if_none_match,
+        )
+
+    async def get_response(
+        self,
+        item_id: UUID4,
+        if_none_match: str | None = None,
+        **parent_ids: UUID4,
+    ) -> Response:
+        """
+        The get_response function returns the encoded item, see
+        cached_response.
+        """
+
+        async def load() -> tuple[ReadSchemaType, dict[str, str]]:
+            return await self.get(item_id, **parent_ids), {}
+
+        return await self.cached_response(
+            self.cache_scope.item_key(item_id),
+            load,
+            tags=self.cache_scope.tree_tags(**parent_ids),
+            if_none_match=if_none_match,
+        )
 
     async def create(
         self,
         item_create_schema: CreateSchemaType,
-        **kwargs,
+        **parent_ids: UUID4,
     ) -> ReadSchemaType:
         """
         The create function creates a new item in the database, set it to cache
-        and returns it. It also deletes all related cached items, so that they
-        can be reloaded from the database.
+        and returns it. It also deletes cached pages of the list of the parent
+        object and all parent objects, as their counts have changed, nested
+        trees of the root object and the catalog version. Cached pages are
+        looked up after the commit, then all cache changes are sent in one
+        round-trip.
+
+        If CACHE_WRITE_THROUGH, cached parent objects are patched in place
+        with their new counters instead, see write_through_changes.
         """
-        obj = await self.db_service.create(
+        obj, counters = await self.db_service.create(
             item_create_schema,
-            **kwargs,
+            **self.db_filters(**parent_ids),
         )
         item = self.process_db_data(obj)
-        for key in [*kwargs.values(), self.items_cache_list]:
-            await self.cache.delete(str(key))
-        await self.cache.set(str(obj.id), item)
+        pages, ancestors_pages = await self.changed_pages(**parent_ids)
+        deleted = [
+            self.cache_scope.pages_tag(**parent_ids),
+            *pages,
+            *ancestors_pages,
+            *self.cache_scope.nested_keys(item.id, **parent_ids),
+            CATALOG_VERSION_KEY,
+        ]
+        if settings.CACHE_WRITE_THROUGH:
+            await self.cache.write_through(
+                self.write_through_changes(counters, **parent_ids),
+                values={self.cache_scope.item_key(item.id): item},
+                deleted=deleted,
+                tags=self.cache_scope.tree_tags(**parent_ids),
+            )
+            return item
+        await self.cache.write(
+            {self.cache_scope.item_key(item.id): item},
+            deleted=[*deleted, *self.cache_scope.ancestors_keys(**parent_ids)],
+            tags=self.cache_scope.tree_tags(**parent_ids),
+        )
         return item
 
     async def update(
         self,
         item_id: UUID4,
         item_update_schema: UpdateSchemaType,
+        **parent_ids: UUID4,
     ) -> ReadSchemaType:
         """
         The update function updates an existing item in the database and cache.
-        It returns a dictionary with all the fields from that object.
+        It returns a dictionary with all the fields from that object. Pages
+        keep their cached ids, only encoded pages of the list, nested trees
+        of the root object and the catalog version are dropped.
+        They are looked up while the database updates the item.
         """
-        obj = await self.db_service.update(item_id, item_update_schema)
+        obj, pages = await asyncio.gather(
+            self.db_service.update(item_id, item_update_schema),
+            self.cache.tags_members(self.cache_scope.pages_tag(**parent_ids)),
+        )
         item = self.process_db_data(obj)
-        await self.cache.set(str(item_id), item)
-        await self.cache.delete(self.items_cache_list)
+        await self.cache.write(
+            {self.cache_scope.item_key(item_id): item},
+            deleted=[
+                *(response_key(key) for key in pages),
+                *self.cache_scope.nested_keys(item_id, **parent_ids),
+                CATALOG_VERSION_KEY,
+            ],
+            tags=self.cache_scope.tree_tags(**parent_ids),
+        )
         return item
 
-    async def delete(self, item_id: UUID4, **kwargs) -> JSONResponse:
+    async def delete(self, item_id: UUID4, **parent_ids: UUID4) -> JSONResponse:
         """
         The delete function is used to delete an item from the database and
-        all related cached items. It takes in an id as an argument and
-        returns the JSONResponse containing a message confirming that object
-        was deleted.
+        all related cached items: the item, pages of the list of the parent
+        object, parent objects with changed counts, nested trees of the root
+        object, the catalog version and the whole item subtree. It returns
+        the JSONResponse containing a message confirming that object was
+        deleted.
+
+        Keys of the item subtree and pages are read while the database deletes
+        the item, then all keys are removed in one round-trip after the
+        commit. Pages cached in between may still list the deleted item, it
+        is skipped as missed in the database. If CACHE_WRITE_THROUGH, cached
+        parent objects are patched in place with their new counters instead
+        of removal.
         """
-        for key in [*kwargs.values(), self.items_cache_list, str(item_id)]:
-            await self.cache.delete(str(key))
-        return await self.db_service.delete(item_id)
+        tree_tag = self.cache_scope.tree_tag(item_id)
+        deletion, subtree_keys, (pages, ancestors_pages) = await asyncio.gather(
+            self.db_service.delete(item_id),
+            self.cache.tags_members(tree_tag),
+            self.changed_pages(**parent_ids),
+        )
+        response, counters = deletion
+        deleted = [
+            self.cache_scope.item_key(item_id),
+            self.cache_scope.pages_tag(**parent_ids),
+            *pages,
+            *ancestors_pages,
+            tree_tag,
+            *subtree_keys,
+            *self.cache_scope.nested_keys(item_id, **parent_ids),
+            CATALOG_VERSION_KEY,
+        ]
+        if settings.CACHE_WRITE_THROUGH:
+            await self.cache.write_through(
+                self.write_through_changes(counters, **parent_ids),
+                deleted=deleted,
+            )
+            return response
+        await self.cache.delete(
+            *deleted,
+            *self.cache_scope.ancestors_keys(**parent_ids),
+        )
+        return response
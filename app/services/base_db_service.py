@@ -1,31 +1,267 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, NoReturn, TypeVar, cast
 
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
 from pydantic.types import UUID4
+from sqlalchemy import delete, insert, literal, tuple_, update
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy.sql import ColumnElement, Delete, Insert, Select, Update
+from sqlmodel import SQLModel, select
 
+from app.core.config import settings
 from app.db.models import DefaultBase, DefaultCreateBase, DefaultUpdateBase
+from app.services.base_cache_service import BaseCacheService
+from app.services.cache_keys import missing_key
+from app.services.pagination import Cursor
 
 ModelType = TypeVar("ModelType", bound=DefaultBase)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=DefaultCreateBase)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=DefaultUpdateBase)
+Counters = dict[str, dict[str, int]]
 
 
 @dataclass
 class BaseDbService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    """Base DB service with list, get, create, update & delete methods."""
+    """
+    Base DB service with list, get, create, update & delete methods. If the
+    cache is set, ids of not found objects are cached for CACHE_NEGATIVE_TTL
+    seconds, so repeated lookups of them do not reach the database.
+    """
 
     model: type[ModelType]
     db_session: AsyncSession
+    cache: BaseCacheService | None = None
+
+    def missing_key(self, id_: UUID4 | str) -> str:
+        """
+        The missing_key function returns the negative cache key of the object.
+        """
+
+        return missing_key(self.model.__name__.lower(), id_)
+
+    async def check_missing(self, id_: UUID4 | str) -> None:
+        """
+        The check_missing function raises an HTTP 404 error without a database
+        query if the object id is in the negative cache.
+
+        Args:
+            id_:UUID4: The id of the object
+        """
+
+        if self.cache is not None and await self.cache.get(self.missing_key(id_)):
+            raise self.not_found_error()
+
+    async def raise_not_found(self, id_: UUID4 | str) -> NoReturn:
+        """
+        The raise_not_found function sets the object id to the negative cache
+        and raises an HTTP 404 error.
+
+        Args:
+            id_:UUID4: The id of the not found object
+        """
+
+        if self.cache is not None:
+            await self.cache.set(
+                self.missing_key(id_),
+                True,
+                ttl=settings.CACHE_NEGATIVE_TTL,
+            )
+        raise self.not_found_error()
+
+    def not_found_error(self) -> HTTPException:
+        """The not_found_error function returns an HTTP 404 error."""
+
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{self.model.__name__.lower()} not found",
+        )
+
+    async def update_counters(self, obj: ModelType, sign: int) -> Counters:
+        """
+        The update_counters function keeps the denormalized children counters
+        of the parent objects up to date. It is called inside the create and
+        delete transactions with sign 1 or -1. Subclasses of child models
+        override it, by default there is nothing to update.
+
+        Args:
+            obj:ModelType: The created or deleted object
+            sign:int: 1 when the object is created, -1 when it is deleted
+
+        Returns:
+            New counters of the parent objects by their model names
+        """
+
+        return {}
+
+    async def update_parent_counters(
+        self,
+        parent: type[SQLModel],
+        where: ColumnElement,
+        **values: Any,
+    ) -> Counters:
+        """
+        The update_parent_counters function updates counters of the parent
+        object and returns their new values by the parent model name. The
+        values are returned by the update itself with RETURNING, databases
+        without RETURNING support get them with a separate query.
+
+        Args:
+            parent:type[SQLModel]: The model of the parent object
+            where:ColumnElement: The criterion of the parent object
+            values:: New values of the counters
+
+        Returns:
+            A dictionary with the new counters of the parent object
+        """
+
+        columns = [parent.__table__.c[field] for field in values]
+        statement = (
+            update(parent)
+            .where(where)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db_session.bind.dialect.full_returning:
+            result = await self.db_session.execute(statement.returning(*columns))
+        else:
+            await self.db_session.execute(statement)
+            result = await self.db_session.execute(select(*columns).where(where))
+        row = result.mappings().one_or_none()
+        return {parent.__name__.lower(): dict(row)} if row else {}
+
+    async def execute_returning(
+        self,
+        statement: Insert | Update | Delete,
+        id_: UUID4 | str,
+    ) -> dict | None:
+        """
+        The execute_returning function executes the insert, update or delete
+        statement of the object and returns the read model data of the changed
+        row, or None if there is no such object. The row is returned by the
+        statement itself with RETURNING, so the write takes one round-trip.
+        Databases without RETURNING support get the row with a separate query,
+        before the delete or after the insert and update.
+
+        Args:
+            statement:Insert | Update | Delete: The write statement
+            id_:UUID4: The id of the object
+
+        Returns:
+            A dictionary with the read model data of the changed row
+        """
+
+        if self.db_session.bind.dialect.full_returning:
+            result = await self.db_session.execute(
+                statement.returning(*self.model.__table__.columns),
+            )
+            row = result.mappings().one_or_none()
+            return dict(row) if row else None
+        read_statement = self.read_statement().where(self.model.id == id_)
+        if statement.is_delete:
+            result = await self.db_session.execute(read_statement)
+            await self.db_session.execute(statement)
+        else:
+            await self.db_session.execute(statement)
+            result = await self.db_session.execute(read_statement)
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    def read_statement(self) -> Select:
+        """
+        The read_statement function returns a select statement of the columns
+        required to build the read model. Subclasses extend it with computed
+        (aggregate) columns.
+        """
+
+        return select(*self.model.__table__.columns)
+
+    async def list_read(
+        self,
+        after: Cursor | None = None,
+        limit: int | None = None,
+        where: Sequence[ColumnElement] = (),
+        **kwargs: Any,
+    ) -> list[dict]:
+        """
+        The list_read function returns the read model data of ModelType
+        objects in the database without loading ORM objects. Objects are
+        ordered by the creation time and id, so the list can be paginated by
+        the ordering key of the last object of the previous page (keyset
+        pagination).
+
+        Args:
+            after:Cursor: The ordering key to return objects after
+            limit:int: The maximum number of objects
+            where:Sequence[ColumnElement]: Additional filter criteria
+            kwargs:: The id of the object
+
+        Returns:
+            A list of dictionaries with the read model data
+        """
+
+        statement = (
+            self.read_statement()
+            .where(*where)
+            .filter_by(**kwargs)
+            .order_by(self.model.created_at, self.model.id)
+            .limit(limit)
+        )
+        if after is not None:
+            after_key: ColumnElement = tuple_(
+                literal(after[0], self.model.created_at.type),
+                literal(after[1], self.model.id.type),
+            )
+            statement = statement.where(
+                tuple_(self.model.created_at, self.model.id) > after_key,
+            )
+        result = await self.db_session.execute(statement)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def get_read(self, id_: UUID4) -> dict:
+        """
+        The get_read function returns the read model data of a single object
+        without loading ORM objects, or raises an HTTP 404 error if no
+        matching object exists.
+
+        Args:
+            id_:UUID4: The id of the object
+
+        Returns:
+            A dictionary with the read model data
+        """
+
+        await self.check_missing(id_)
+        statement = self.read_statement().where(self.model.id == id_)
+        result = await self.db_session.execute(statement)
+        row = result.mappings().one_or_none()
+        if row is None:
+            await self.raise_not_found(id_)
+        return dict(row)
+
+    async def list_read_by_ids(self, ids: Sequence[UUID4 | str]) -> list[dict]:
+        """
+        The list_read_by_ids function returns the read model data of the
+        objects with the given ids in a single query.
+
+        Args:
+            ids:Sequence[UUID4 | str]: The ids of the objects
+
+        Returns:
+            A list of dictionaries with the read model data
+        """
+
+        statement = self.read_statement().where(self.model.id.in_(ids))
+        result = await self.db_session.execute(statement)
+        return [dict(row) for row in result.mappings().all()]
 
     async def list(self, **kwargs: Any) -> list[ModelType]:
         """
         The list function returns all ModelType objects in the database.
+        Relationships are lazy, they are not loaded with the objects.
 
         Args:
             kwargs:: The id of the object
@@ -34,7 +270,11 @@ class BaseDbService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             A list of objects that are instances of the ModelType
         """
 
-        statement = select(self.model).filter_by(**kwargs)
+        statement = (
+            select(self.model)
+            .filter_by(**kwargs)
+            .order_by(self.model.created_at, self.model.id)
+        )
         result = await self.db_session.execute(statement)
         objs: list[ModelType] = result.scalars().all()
         return objs
@@ -43,7 +283,8 @@ class BaseDbService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         The get function is used to retrieve a single object from the database.
         It takes an id and returns the corresponding object, or raises an
-        HTTP 404 error if no matching object exists.
+        HTTP 404 error if no matching object exists. Relationships are lazy,
+        they are not loaded with the object.
 
         Args:
             id_:UUID4: The id of the object
@@ -52,83 +293,115 @@ class BaseDbService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             The object of ModelType that has the id param as its primary key
         """
 
+        await self.check_missing(id_)
         statement = select(self.model).where(self.model.id == id_)
         result = await self.db_session.execute(statement)
         try:
             obj: ModelType = result.scalar_one()
             return obj
         except NoResultFound:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"{self.model.__name__.lower()} not found",
-            )
+            await self.raise_not_found(id_)
 
     async def create(
         self,
         obj: CreateSchemaType,
         **kwargs,
-    ) -> ModelType:
+    ) -> tuple[dict, Counters]:
         """
         The create function makes a new object of the type specified in the
         CreateSchemaType parameter. It takes an argument of obj which is an
-        instance of CreateSchemaType and returns a ModelType object.
+        instance of CreateSchemaType and returns the read data of the created
+        object, see execute_returning, and new counters of its parent
+        objects, see update_counters.
 
         Args:
             obj:CreateSchemaType: Specify the schema to use for validation
 
         Returns:
-            The created ModelType object
+            A dictionary with the read model data of the created object and
+            a dictionary with new counters of the parent objects
         """
 
         db_obj: ModelType = self.model(**dict(**obj.dict(), **kwargs))
-        self.db_session.add(db_obj)
+        item = cast(
+            dict,
+            await self.execute_returning(
+                insert(self.model).values(**db_obj.dict()),
+                db_obj.id,
+            ),
+        )
+        counters = await self.update_counters(db_obj, 1)
         await self.db_session.commit()
-        return await self.get(db_obj.id)
+        if self.cache is not None:
+            await self.cache.delete(self.missing_key(db_obj.id))
+        return item, counters
 
     async def update(
         self,
         id_: UUID4,
         obj: UpdateSchemaType,
-    ) -> ModelType:
+    ) -> dict:
         """
         The update function updates an existing object in the database.
         It takes two arguments, id_ and obj. The id_ argument is the unique
         identifier of a specific object in the database, and obj is a
         dictionary containing all the columns to be updated for that object.
+        The object is updated with a single statement, see execute_returning.
 
         Args:
             id_:UUID4: Identify the object to update
             obj:UpdateSchemaType: Specify the schema for data validation
 
         Returns:
-            The updated object
+            A dictionary with the read model data of the updated object
         """
 
-        db_obj = await self.get(id_)
-        for column, value in obj.dict(exclude_unset=True).items():
-            setattr(db_obj, column, value)
+        values = obj.dict(exclude_unset=True)
+        if not values:
+            return await self.get_read(id_)
+        await self.check_missing(id_)
+        item = await self.execute_returning(
+            update(self.model)
+            .where(self.model.id == id_)
+            .values(**values)
+            .execution_options(synchronize_session=False),
+            id_,
+        )
+        if item is None:
+            await self.raise_not_found(id_)
         await self.db_session.commit()
-        return db_obj
+        return item
 
-    async def delete(self, id_: UUID4) -> JSONResponse:
+    async def delete(self, id_: UUID4) -> tuple[JSONResponse, Counters]:
         """
         The delete function is used to delete an item from the database.
         It takes a UUID4 as an argument and deletes the object with that ID
         from the database. The function returns a JSONResponse containing a
-        message confirming that it was deleted.
+        message confirming that it was deleted and new counters of the parent
+        objects, see update_counters. Children objects are deleted by the
+        database (ON DELETE CASCADE), they are not loaded.
 
         Args:
             id_:UUID4: Get the id of the object that is to be deleted
 
         Returns:
             A JSONResponse containing a message confirming that it was deleted
+            and a dictionary with new counters of the parent objects
         """
 
-        db_obj = await self.get(id_)
-        await self.db_session.delete(db_obj)
+        await self.check_missing(id_)
+        item = await self.execute_returning(
+            delete(self.model)
+            .where(self.model.id == id_)
+            .execution_options(synchronize_session=False),
+            id_,
+        )
+        if item is None:
+            await self.raise_not_found(id_)
+        counters = await self.update_counters(self.model(**item), -1)
         await self.db_session.commit()
         item_data = {
             "status": True,
             "message": f"The {self.model.__name__.lower()} has been deleted",
         }
-        return JSONResponse(content=item_data)
+        return JSONResponse(content=item_data), counters
@@ -0,0 +1,148 @@
+import datetime
+import json
+import zlib
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Protocol
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class CacheCodec(Protocol):
+    """Serializes cached values to bytes and back."""
+
+    def encode(self, value: Any) -> bytes:
+        ...
+
+    def decode(self, data: bytes) -> Any:
+        ...
+
+
+def default_encoder(obj: Any) -> Any:
+    """
+    The default_encoder function converts objects unsupported by the orjson
+    and msgpack codecs to their JSON compatible representation.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class JsonCodec:
+    """Standard library JSON codec."""
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(jsonable_encoder(value)).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson codec, it serializes dataclasses and UUIDs natively."""
+
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("orjson codec requires orjson package")
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=default_encoder)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack binary codec."""
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack codec requires msgpack package")
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=default_encoder)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+@dataclass
+class CompressedCodec:
+    """
+    Codec wrapper which compresses values larger than the threshold. The first
+    byte of the data is a header: 0 - raw data, 1 - zlib, 2 - zstd.
+    """
+
+    codec: CacheCodec
+    threshold: int
+    algorithm: str = "zlib"
+    level: int = 3
+
+    def __post_init__(self):
+        if self.algorithm == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires zstandard package")
+
+    def encode(self, value: Any) -> bytes:
+        data = self.codec.encode(value)
+        if len(data) < self.threshold:
+            return b"\x00" + data
+        if self.algorithm == "zstd":
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            return b"\x02" + compressor.compress(data)
+        return b"\x01" + zlib.compress(data, self.level)
+
+    def decode(self, data: bytes) -> Any:
+        header, data = data[:1], data[1:]
+        if header == b"\x01":
+            data = zlib.decompress(data)
+        elif header == b"\x02":
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return self.codec.decode(data)
+
+
+CODECS: dict[str, type[CacheCodec]] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+
+def get_cache_codec(
+    name: str = settings.CACHE_CODEC,
+    compression: str | None = settings.CACHE_COMPRESSION,
+    threshold: int = settings.CACHE_COMPRESSION_THRESHOLD,
+) -> CacheCodec:
+    """
+    The get_cache_codec function returns the cache codec by its name, wrapped
+    with compression of values larger than the threshold if it is enabled.
+    """
+    codec = CODECS[name]()
+    if compression:
+        return CompressedCodec(codec, threshold=threshold, algorithm=compression)
+    return codec
+
+
+cache_codec = get_cache_codec()
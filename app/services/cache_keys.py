@@ -0,0 +1,140 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from pydantic.types import UUID4
+
+RESPONSE_PREFIX = "response:"
+
+
+def response_key(key: str) -> str:
+    """Returns cache key of the encoded response body of the cached value."""
+    return f"{RESPONSE_PREFIX}{key}"
+
+
+def is_response_key(key: str) -> bool:
+    """Returns whether the key holds an encoded response body."""
+    return key.startswith(RESPONSE_PREFIX)
+
+
+CATALOG_VERSION_KEY = "catalog:version"
+WARM_UP_KEY = "warm_up"
+
+
+def report_key(version: str) -> str:
+    """Returns cache key of the report task id of the catalog version."""
+    return f"report:{version}"
+
+
+def report_status_key(task_id: str) -> str:
+    """Returns cache key of the status of the report task."""
+    return f"report_status:{task_id}"
+
+
+def missing_key(name: str, item_id: UUID4 | str) -> str:
+    """Returns cache key of the negative cache entry of a not found object."""
+    return f"missing:{name}:{item_id}"
+
+
+@dataclass(frozen=True)
+class CacheScope:
+    """
+    Cache keys of a level of the menu -> submenu -> dish hierarchy.
+
+    Item keys hold a single object, page keys hold ordered ids of a page of
+    the children of a parent object and the cursor of the next page. Every
+    cached entry of a subtree is tagged with the tree tags of its ancestors,
+    so deleting an object purges its whole subtree. Pages of a list are also
+    tagged with the pages tag of the list. Nested keys hold trees of root
+    objects with all their descendants, any write in the tree drops them.
+    """
+
+    name: str
+    list_name: str
+    parent: "CacheScope | None" = None
+
+    @property
+    def id_field(self) -> str:
+        """Name of the path parameter and foreign key of this level."""
+        return f"{self.name}_id"
+
+    @property
+    def count_field(self) -> str:
+        """Name of the children counter of this level in parent objects."""
+        return f"{self.list_name.removesuffix('_list')}_count"
+
+    def ancestors(self) -> Iterator["CacheScope"]:
+        """Yields parent levels from the nearest one to the root."""
+        scope = self.parent
+        while scope is not None:
+            yield scope
+            scope = scope.parent
+
+    def item_key(self, item_id: UUID4 | str) -> str:
+        """Returns cache key of a single object."""
+        return f"{self.name}:{item_id}"
+
+    def list_key(self, **parent_ids: UUID4 | str) -> str:
+        """Returns cache key of the objects list of the parent object."""
+        if self.parent is None:
+            return self.list_name
+        return f"{self.list_name}:{parent_ids[self.parent.id_field]}"
+
+    def page_key(
+        self,
+        cursor: str | None,
+        limit: int,
+        **parent_ids: UUID4 | str,
+    ) -> str:
+        """Returns cache key of a page of the objects list."""
+        return f"{self.list_key(**parent_ids)}:{limit}:{cursor or ''}"
+
+    def pages_tag(self, **parent_ids: UUID4 | str) -> str:
+        """Returns tag of all cached pages of the objects list."""
+        return f"pages:{self.list_key(**parent_ids)}"
+
+    def ancestors_pages_tags(self, **parent_ids: UUID4 | str) -> list[str]:
+        """Returns pages tags of lists of all parent objects."""
+        return [scope.pages_tag(**parent_ids) for scope in self.ancestors()]
+
+    def nested_key(self, item_id: UUID4 | str | None = None) -> str:
+        """
+        Returns cache key of the nested tree of the object, or of all objects
+        of this level if there is no id.
+        """
+        if item_id is None:
+            return f"nested:{self.list_name}"
+        return f"nested:{self.item_key(item_id)}"
+
+    def nested_keys(self, item_id: UUID4 | str, **parent_ids: UUID4 | str) -> list[str]:
+        """
+        Returns keys of nested trees of the root object and all root objects,
+        which contain the object.
+        """
+        *_, root = self, *self.ancestors()
+        root_id = parent_ids.get(root.id_field, item_id)
+        return [root.nested_key(root_id), root.nested_key()]
+
+    def tree_tag(self, item_id: UUID4 | str) -> str:
+        """Returns tag of all cached entries of the object subtree."""
+        return f"{self.name}_tree:{item_id}"
+
+    def tree_tags(self, **parent_ids: UUID4 | str) -> list[str]:
+        """Returns tree tags of all parent objects."""
+        return [
+            scope.tree_tag(parent_ids[scope.id_field]) for scope in self.ancestors()
+        ]
+
+    def ancestors_keys(self, **parent_ids: UUID4 | str) -> list[str]:
+        """
+        Returns item keys of all parent objects. Their children counts change
+        when an object of this level is created or deleted, while ids in
+        pages of their lists stay the same.
+        """
+        return [
+            scope.item_key(parent_ids[scope.id_field]) for scope in self.ancestors()
+        ]
+
+
+MENU_SCOPE = CacheScope("menu", "menus_list")
+SUBMENU_SCOPE = CacheScope("submenu", "submenus_list", MENU_SCOPE)
+DISH_SCOPE = CacheScope("dish", "dishes_list", SUBMENU_SCOPE)
@@ -0,0 +1,33 @@
+import uuid
+
+from aioredis import Redis
+
+from app.services.cache_keys import CATALOG_VERSION_KEY
+
+
+async def set_default(
+    cache: Redis,
+    key: str,
+    value: str,
+    ex: int | None = None,
+) -> tuple[str, bool]:
+    """
+    The set_default function sets the value of the key if it is not set and
+    returns the current value and whether it was set, in one atomic MULTI
+    transaction.
+    """
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.set(key, value, ex=ex, nx=True)
+        pipe.get(key)
+        created, current = await pipe.execute()
+    return current.decode(), bool(created)
+
+
+async def catalog_version(cache: Redis) -> str:
+    """
+    The catalog_version function returns the token of the current catalog
+    version. Every write of menus, submenus or dishes drops the token, the
+    next call creates a new one.
+    """
+    version, _ = await set_default(cache, CATALOG_VERSION_KEY, uuid.uuid4().hex)
+    return version
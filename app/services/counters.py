@@ -0,0 +1,142 @@
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.sql import Select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Dish, Menu, Submenu
+from app.services.base_cache_service import BaseCacheService
+from app.services.cache_keys import CATALOG_VERSION_KEY, MENU_SCOPE, SUBMENU_SCOPE
+
+
+def menu_counts_statement() -> Select:
+    """
+    The menu_counts_statement function returns a select statement of the
+    actual submenus and dishes counts of every menu, calculated by correlated
+    subqueries.
+    """
+    submenus_count = (
+        select(func.count(Submenu.id))
+        .where(Submenu.menu_id == Menu.id)
+        .scalar_subquery()
+    )
+    dishes_count = (
+        select(func.count(Dish.id))
+        .join(Submenu, Dish.submenu_id == Submenu.id)
+        .where(Submenu.menu_id == Menu.id)
+        .scalar_subquery()
+    )
+    return select(
+        Menu.id,
+        Menu.submenus_count,
+        Menu.dishes_count,
+        submenus_count.label("actual_submenus_count"),
+        dishes_count.label("actual_dishes_count"),
+    )
+
+
+def submenu_counts_statement() -> Select:
+    """
+    The submenu_counts_statement function returns a select statement of the
+    actual dishes count of every submenu, calculated by a correlated subquery.
+    """
+    dishes_count = (
+        select(func.count(Dish.id))
+        .where(Dish.submenu_id == Submenu.id)
+        .scalar_subquery()
+    )
+    return select(
+        Submenu.id,
+        Submenu.menu_id,
+        Submenu.dishes_count,
+        dishes_count.label("actual_dishes_count"),
+    )
+
+
+async def check_counters(db_session: AsyncSession) -> dict[str, list[dict]]:
+    """
+    The check_counters function compares denormalized counters of menus and
+    submenus with the actual counts and returns the drifted rows.
+    """
+    menus = menu_counts_statement().subquery()
+    submenus = submenu_counts_statement().subquery()
+    menus_result = await db_session.execute(
+        select(menus).where(
+            or_(
+                menus.c.submenus_count != menus.c.actual_submenus_count,
+                menus.c.dishes_count != menus.c.actual_dishes_count,
+            )
+        )
+    )
+    submenus_result = await db_session.execute(
+        select(submenus).where(
+            submenus.c.dishes_count != submenus.c.actual_dishes_count,
+        )
+    )
+    return {
+        "menus": [dict(row) for row in menus_result.mappings().all()],
+        "submenus": [dict(row) for row in submenus_result.mappings().all()],
+    }
+
+
+async def repair_counters(db_session: AsyncSession) -> dict[str, list[dict]]:
+    """
+    The repair_counters function recalculates denormalized counters of all
+    menus and submenus in one transaction and returns the repaired rows, see
+    check_counters.
+    """
+    drift = await check_counters(db_session)
+    await db_session.execute(
+        update(Submenu)
+        .values(
+            dishes_count=(
+                select(func.count(Dish.id))
+                .where(Dish.submenu_id == Submenu.id)
+                .scalar_subquery()
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.execute(
+        update(Menu)
+        .values(
+            submenus_count=(
+                select(func.count(Submenu.id))
+                .where(Submenu.menu_id == Menu.id)
+                .scalar_subquery()
+            ),
+            dishes_count=(
+                select(func.coalesce(func.sum(Submenu.dishes_count), 0))
+                .where(Submenu.menu_id == Menu.id)
+                .scalar_subquery()
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+    return drift
+
+
+async def invalidate_counters(
+    cache: BaseCacheService,
+    drift: dict[str, list[dict]],
+) -> None:
+    """
+    The invalidate_counters function removes cached menus and submenus with
+    repaired counters, pages of their lists, the nested trees of their menus
+    and the catalog version, so no cached response serves drifted counters.
+    """
+    menu_ids = {row["id"] for row in drift["menus"]}
+    menu_ids.update(row["menu_id"] for row in drift["submenus"])
+    if not menu_ids:
+        return
+    tags = [MENU_SCOPE.pages_tag()] + [
+        SUBMENU_SCOPE.pages_tag(menu_id=menu_id) for menu_id in menu_ids
+    ]
+    await cache.delete(
+        *[MENU_SCOPE.item_key(row["id"]) for row in drift["menus"]],
+        *[SUBMENU_SCOPE.item_key(row["id"]) for row in drift["submenus"]],
+        *[MENU_SCOPE.nested_key(menu_id) for menu_id in menu_ids],
+        MENU_SCOPE.nested_key(),
+        CATALOG_VERSION_KEY,
+        *tags,
+        *await cache.tags_members(*tags),
+    )
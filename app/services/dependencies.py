@@ -1,48 +1,151 @@
-from fastapi import Depends, Request
+import uuid
+from collections.abc import Awaitable, Callable
+
+from aioredis import Redis
+from fastapi import Depends, Request, status
+from fastapi.exceptions import HTTPException, RequestValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import UUIDError
+from sqlalchemy import and_
+from sqlalchemy.sql import Select
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.config import settings
+from app.db.cache import get_cache, get_local_cache
 from app.db.database import get_session
-from app.db.models import Menu, Submenu
-from app.services.menu import MenuModelService
-from app.services.submenu import SubmenuModelService
+from app.db.local_cache import LocalCache
+from app.db.models import DefaultUUIDBase, Dish, Menu, Submenu
+from app.services.base_cache_service import BaseCacheService
+from app.services.cache_keys import DISH_SCOPE, SUBMENU_SCOPE, CacheScope
+
+SCOPE_MODELS: dict[str, type[DefaultUUIDBase]] = {
+    "menu": Menu,
+    "submenu": Submenu,
+    "dish": Dish,
+}
+
+
+def path_levels(
+    scope: CacheScope,
+    path_params: dict[str, str],
+) -> list[tuple[CacheScope, uuid.UUID]]:
+    """
+    The path_levels function returns levels of the hierarchy from the root
+    with their ids from the path parameters. The item_id parameter is the id
+    of the scope level, it is checked only if the path contains it. Malformed
+    ids raise a validation error (HTTP 422), as path parameters typed UUID4 in
+    the endpoints do.
+    """
+    levels = [(level, level.id_field) for level in scope.ancestors()][::-1]
+    if "item_id" in path_params:
+        levels.append((scope, "item_id"))
+    ids = []
+    for level, param in levels:
+        try:
+            ids.append((level, uuid.UUID(path_params[param])))
+        except ValueError:
+            raise RequestValidationError(
+                [ErrorWrapper(UUIDError(), loc=("path", param))],
+            )
+    return ids
 
 
-async def validate_menu_model(
-    request: Request,
-    db_session: AsyncSession = Depends(get_session),
-) -> Menu | None:
+def path_statement(levels: list[tuple[CacheScope, uuid.UUID]]) -> Select:
     """
-    The validate_menu_model function is a dependency function that will be used
-    by the get_menu_by_id endpoint. It takes in a request object and returns an
-    instance of MenuModel. It does this by using the get method from
-    MenuCRUDService class to retrieve an instance of MenuModel from database.
+    The path_statement function returns a select statement of ids of all
+    path levels. Every level is outer joined with its parent by the id and
+    the foreign key, so a missing or mismatched level is selected as null.
     """
-    menu_id = request.path_params.get("menu_id")
-    db_service = MenuModelService(Menu, db_session)
-    return await db_service.get(menu_id)
+    root, root_id = levels[0]
+    parent = SCOPE_MODELS[root.name]
+    statement = select(*(SCOPE_MODELS[level.name].id for level, _ in levels))
+    statement = statement.select_from(parent).where(parent.id == root_id)
+    for (parent_level, _), (level, level_id) in zip(levels, levels[1:]):
+        model = SCOPE_MODELS[level.name]
+        statement = statement.outerjoin(
+            model,
+            and_(
+                model.id == level_id,
+                getattr(model, parent_level.id_field) == parent.id,
+            ),
+        )
+        parent = model
+    return statement
 
 
-async def validate_submenu_model(
-    request: Request,
-    db_session: AsyncSession = Depends(get_session),
-):
+async def check_path(
+    db_session: AsyncSession,
+    levels: list[tuple[CacheScope, uuid.UUID]],
+) -> str:
     """
-    The validate_submenu_model function is a dependency function that takes in
-    the request object and db_session object. It then uses the path parameters
-    to get the submenu id from the url. The submenu id is used to query
-    the database for a specific menu item using SubmenuModelService.
-    This function will be used as a dependency in other functions.
+    The check_path function returns the name of the first missing or
+    mismatched level of the path, or an empty string if all levels exist.
     """
-    menu_id = request.path_params.get("submenu_id")
-    db_service = SubmenuModelService(Submenu, db_session)
-    return await db_service.get(menu_id)
+    result = await db_session.execute(path_statement(levels))
+    row = result.one_or_none()
+    for level, _ in levels:
+        if row is None or row[0] is None:
+            return level.name
+        row = row[1:]
+    return ""
 
 
-async def get_submenu_id(
-    request: Request,
-):
+def not_found_error(scope: CacheScope) -> HTTPException:
+    """The not_found_error function returns an HTTP 404 error of the level."""
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{scope.name} not found",
+    )
+
+
+def validate_path(
+    scope: CacheScope,
+) -> Callable[..., Awaitable[dict[str, uuid.UUID]]]:
     """
-    The get_submenu_id function is a dependency function that gets and return
-    submenu_id from Request.
+    The validate_path function returns a dependency function which checks
+    that all objects of the path exist and belong to their parents with a
+    single query of ids, without loading objects and their relationships.
+    Checked paths are cached with the tree tags of all their objects, so
+    deleting any of them drops the path. Not found paths are cached for
+    CACHE_NEGATIVE_TTL seconds. The dependency returns the parent ids of the
+    scope.
     """
-    return request.path_params.get("submenu_id")
+
+    async def dependency(
+        request: Request,
+        db_session: AsyncSession = Depends(get_session),
+        cache: Redis = Depends(get_cache),
+        local_cache: LocalCache | None = Depends(get_local_cache),
+    ) -> dict[str, uuid.UUID]:
+        levels = path_levels(scope, request.path_params)
+        parent_ids = {
+            level.id_field: level_id for level, level_id in levels if level is not scope
+        }
+        cache_service = BaseCacheService(cache, local_cache)
+        key = "path:" + "/".join(str(level_id) for _, level_id in levels)
+        missing = await cache_service.get(key)
+        if missing is None:
+            missing = await check_path(db_session, levels)
+            if missing:
+                await cache_service.set(
+                    key,
+                    missing,
+                    ttl=settings.CACHE_NEGATIVE_TTL,
+                )
+            else:
+                await cache_service.set(
+                    key,
+                    missing,
+                    tags=[level.tree_tag(level_id) for level, level_id in levels],
+                )
+        for level, _ in levels:
+            if level.name == missing:
+                raise not_found_error(level)
+        return parent_ids
+
+    return dependency
+
+
+validate_submenu_path = validate_path(SUBMENU_SCOPE)
+validate_dish_path = validate_path(DISH_SCOPE)
@@ -1,18 +1,44 @@
 from aioredis import Redis
 from fastapi import Depends
+from sqlmodel import col, select
 
-from app.db.cache import get_cache
-from app.db.database import get_session
-from app.db.models import Dish, DishCreate, DishRead, DishUpdate
+from app.core.config import settings
+from app.db.cache import get_cache, get_local_cache
+from app.db.database import async_session, get_session
+from app.db.local_cache import LocalCache
+from app.db.models import Dish, DishCreate, DishRead, DishUpdate, Menu, Submenu
 from app.services.base_cache_service import BaseCacheService
 from app.services.base_crud_service import BaseCRUDService
-from app.services.base_db_service import BaseDbService
+from app.services.base_db_service import BaseDbService, Counters
+from app.services.cache_keys import DISH_SCOPE
 
 
 class DishModelService(BaseDbService[Dish, DishCreate, DishUpdate]):
     """Model service class for Dish."""
 
-    pass
+    async def update_counters(self, dish: Dish, sign: int) -> Counters:
+        """
+        The update_counters function updates dishes counters of the parent
+        submenu and menu and returns their new values.
+        """
+        counters = await self.update_parent_counters(
+            Submenu,
+            col(Submenu.id) == dish.submenu_id,
+            dishes_count=Submenu.dishes_count + sign,
+        )
+        menu_id = (
+            select(Submenu.menu_id)
+            .where(Submenu.id == dish.submenu_id)
+            .scalar_subquery()
+        )
+        counters.update(
+            await self.update_parent_counters(
+                Menu,
+                col(Menu.id) == menu_id,
+                dishes_count=Menu.dishes_count + sign,
+            )
+        )
+        return counters
 
 
 class DishCRUDService(BaseCRUDService[DishRead, DishCreate, DishUpdate]):
@@ -23,15 +49,19 @@ class DishCRUDService(BaseCRUDService[DishRead, DishCreate, DishUpdate]):
 
 async def get_dish_service(
     cache: Redis = Depends(get_cache),
+    local_cache: LocalCache | None = Depends(get_local_cache),
     session=Depends(get_session),
 ) -> DishCRUDService:
     """
     The get_dish_service function returns a DishCRUDService object. The
     DishCRUDService class is used to create, read, update and delete dishes.
     """
+    cache_service = BaseCacheService(cache, local_cache)
     return DishCRUDService(
-        cache=BaseCacheService(cache),
-        db_service=DishModelService(Dish, session),
+        cache=cache_service,
+        db_service=DishModelService(Dish, session, cache_service),
         read_model=DishRead,
-        items_cache_list="dishes_list",
+        cache_scope=DISH_SCOPE,
+        soft_ttl=settings.DISH_CACHE_SOFT_TTL,
+        session_factory=async_session,
     )
@@ -1,48 +1,116 @@
+import datetime
+import itertools
 import json
 import os
+import uuid
+from collections.abc import Iterator
+from typing import Any
 
-from app.core.config import BASEDIR
-from app.db.models import DishCreate, MenuCreate, SubmenuCreate
-from app.services.dish import DishCRUDService
-from app.services.menu import MenuCRUDService
-from app.services.submenu import SubmenuCRUDService
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import BASEDIR, settings
+from app.db.models import Dish, DishCreate, Menu, MenuCreate, Submenu, SubmenuCreate
+from app.services.base_cache_service import BaseCacheService
+from app.services.cache_keys import CATALOG_VERSION_KEY, MENU_SCOPE
+from app.services.warm_up import warm_up_cache
+
+DB_DATA_PATH = os.path.join(BASEDIR, "app/db/data/db_data.json")
+
+
+def catalog_rows(catalog: list[dict]) -> dict[type[SQLModel], list[dict]]:
+    """
+    The catalog_rows function validates the catalog of menus with nested
+    submenus and dishes and returns rows of every table. Ids and counters are
+    generated here, creation times follow the catalog order, so lists keep it.
+    """
+    rows: dict[type[SQLModel], list[dict]] = {Menu: [], Submenu: [], Dish: []}
+    start = datetime.datetime.utcnow()
+    order = itertools.count()
+
+    def created_at() -> datetime.datetime:
+        return start + datetime.timedelta(microseconds=next(order))
+
+    for menu in catalog:
+        menu_row: dict[str, Any] = {
+            **MenuCreate.parse_obj(menu).dict(),
+            "id": uuid.uuid4(),
+            "created_at": created_at(),
+            "submenus_count": len(menu.get("submenus", [])),
+            "dishes_count": 0,
+        }
+        rows[Menu].append(menu_row)
+        for submenu in menu.get("submenus", []):
+            submenu_row = {
+                **SubmenuCreate.parse_obj(submenu).dict(),
+                "id": uuid.uuid4(),
+                "created_at": created_at(),
+                "menu_id": menu_row["id"],
+                "dishes_count": len(submenu.get("dishes", [])),
+            }
+            menu_row["dishes_count"] += submenu_row["dishes_count"]
+            rows[Submenu].append(submenu_row)
+            rows[Dish].extend(
+                {
+                    **DishCreate.parse_obj(dish).dict(),
+                    "id": uuid.uuid4(),
+                    "created_at": created_at(),
+                    "submenu_id": submenu_row["id"],
+                }
+                for dish in submenu.get("dishes", [])
+            )
+    return rows
+
+
+def batches(rows: list[dict], size: int) -> Iterator[list[dict]]:
+    """The batches function splits the rows into batches of the size."""
+    for start in range(0, len(rows), size):
+        end = start + size
+        yield rows[start:end]
+
+
+async def import_catalog(
+    db_session: AsyncSession,
+    cache: BaseCacheService,
+    catalog: list[dict],
+) -> dict[str, int]:
+    """
+    The import_catalog function inserts the catalog into the database in one
+    transaction, every table is filled with batched executemany inserts of
+    IMPORT_BATCH_SIZE rows. Cached pages and the nested tree of all menus and
+    the catalog version are invalidated and the cache is warmed up once at
+    the end. It returns the numbers of imported objects.
+    """
+    rows = catalog_rows(catalog)
+    for model, model_rows in rows.items():
+        for batch in batches(model_rows, settings.IMPORT_BATCH_SIZE):
+            await db_session.execute(insert(model.__table__), batch)
+    await db_session.commit()
+    pages = await cache.tags_members(MENU_SCOPE.pages_tag())
+    await cache.delete(
+        MENU_SCOPE.pages_tag(),
+        *pages,
+        MENU_SCOPE.nested_key(),
+        CATALOG_VERSION_KEY,
+    )
+    await warm_up_cache(db_session, cache)
+    return {
+        "menus": len(rows[Menu]),
+        "submenus": len(rows[Submenu]),
+        "dishes": len(rows[Dish]),
+    }
 
 
 async def load_json_data(
-    menu_service: MenuCRUDService,
-    submenu_service: SubmenuCRUDService,
-    dish_service: DishCRUDService,
-) -> None:
+    db_session: AsyncSession,
+    cache: BaseCacheService,
+    path: str = DB_DATA_PATH,
+) -> dict[str, int]:
     """
     The load_json_data function is used to load the initial data into the
-    database.
+    database, see import_catalog.
     """
-    path = os.path.join(BASEDIR, "app/db/data/db_data.json")
     with open(path) as file:
-        load_data = json.loads(file.read())
-        for menu in load_data:
-            menu_obj = await menu_service.create(
-                MenuCreate(
-                    title=menu.get("title"),
-                    description=menu.get("description"),
-                )
-            )
-            menu_id = menu_obj.id
-            for submenu in menu.get("submenus"):
-                submenu_obj = await submenu_service.create(
-                    SubmenuCreate(
-                        title=submenu.get("title"),
-                        description=submenu.get("description"),
-                    ),
-                    menu_id=menu_id,
-                )
-                submenu_id = submenu_obj.id
-                for dish in submenu.get("dishes"):
-                    await dish_service.create(
-                        DishCreate(
-                            title=dish.get("title"),
-                            description=dish.get("description"),
-                            price=dish.get("price"),
-                        ),
-                        submenu_id=submenu_id,
-                    )
+        catalog = json.loads(file.read())
+    return await import_catalog(db_session, cache, catalog)
@@ -1,42 +1,60 @@
 from aioredis import Redis
-from fastapi import Depends
+from fastapi import Depends, Response
+from pydantic.types import UUID4
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.cache import get_cache
-from app.db.database import get_session
-from app.db.models import Menu, MenuCreate, MenuRead, MenuUpdate
+from app.core.config import settings
+from app.db.cache import get_cache, get_local_cache
+from app.db.database import async_session, get_session
+from app.db.local_cache import LocalCache
+from app.db.models import Menu, MenuCreate, MenuRead, MenuTree, MenuUpdate
 from app.services.base_cache_service import BaseCacheService
 from app.services.base_crud_service import BaseCRUDService
 from app.services.base_db_service import BaseDbService
+from app.services.cache_keys import MENU_SCOPE
+from app.services.menu_tree import load_menus_tree
 
 
 class MenuModelService(BaseDbService[Menu, MenuCreate, MenuUpdate]):
     """Model Service class for Menu."""
 
-    pass
-
 
 class MenuCRUDService(BaseCRUDService[MenuRead, MenuCreate, MenuUpdate]):
     """CRUD service class for Menu"""
 
-    def process_db_data(self, menu: Menu):
+    async def tree_response(
+        self,
+        menu_id: UUID4 | None = None,
+        if_none_match: str | None = None,
+    ) -> Response:
         """
-        The process_db_data function takes in a ModelType object and returns
-        the data in that object as a dictionary. This function is used to
-        convert the database data into JSON format and add required fields.
+        The tree_response function returns the encoded menu with nested
+        submenus and dishes, or all menus if there is no menu id, see
+        cached_response. Any write in the menu tree drops it from the cache.
         """
-        data = {
-            **menu.dict(),
-            "submenus_count": len(menu.submenus),
-            "dishes_count": sum(
-                [len(submenu.dishes) for submenu in menu.submenus],
-            ),
-        }
-        return self.read_model.parse_obj(data)
+
+        async def load() -> tuple[MenuTree | list[MenuTree], dict[str, str]]:
+            if menu_id is not None:
+                await self.db_service.check_missing(menu_id)
+            trees = await load_menus_tree(self.db_service.db_session, menu_id)
+            if menu_id is None:
+                return trees, {}
+            if not trees:
+                await self.db_service.raise_not_found(menu_id)
+            return trees[0], {}
+
+        return await self.cached_response(
+            self.cache_scope.nested_key(menu_id),
+            load,
+            tags=[] if menu_id is None else [self.cache_scope.tree_tag(menu_id)],
+            if_none_match=if_none_match,
+            model=MenuTree,
+        )
 
 
 async def get_menu_service(
     cache: Redis = Depends(get_cache),
+    local_cache: LocalCache | None = Depends(get_local_cache),
     db_session: AsyncSession = Depends(get_session),
 ) -> MenuCRUDService:
     """
@@ -44,9 +62,12 @@ async def get_menu_service(
     instance of the MenuCRUDService class. It takes in a db_session parameter,
     which is an async session from the fastapi dependency injection framework.
     """
+    cache_service = BaseCacheService(cache, local_cache)
     return MenuCRUDService(
-        cache=BaseCacheService(cache),
-        db_service=MenuModelService(Menu, db_session),
+        cache=cache_service,
+        db_service=MenuModelService(Menu, db_session, cache_service),
         read_model=MenuRead,
-        items_cache_list="menus_list",
+        cache_scope=MENU_SCOPE,
+        soft_ttl=settings.MENU_CACHE_SOFT_TTL,
+        session_factory=async_session,
     )
@@ -0,0 +1,46 @@
+from collections import defaultdict
+from typing import Any
+
+from pydantic.types import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.db.models import Dish, DishRead, Menu, MenuTree, Submenu, SubmenuTree
+from app.services.base_db_service import BaseDbService
+
+
+async def load_menus_tree(
+    db_session: AsyncSession,
+    menu_id: UUID4 | None = None,
+) -> list[MenuTree]:
+    """
+    The load_menus_tree function returns menus with nested submenus and
+    dishes, all of them or the one with the menu id. The tree is loaded with
+    a query per level, children keep the order of their lists.
+    """
+    menu_filters: dict[str, Any] = {} if menu_id is None else {"id": menu_id}
+    submenu_filters: dict[str, Any] = {} if menu_id is None else {"menu_id": menu_id}
+    dish_where = (
+        ()
+        if menu_id is None
+        else [
+            col(Dish.submenu_id).in_(
+                select(Submenu.id).where(Submenu.menu_id == menu_id),
+            ),
+        ]
+    )
+    menus = await BaseDbService(Menu, db_session).list_read(**menu_filters)
+    submenus = await BaseDbService(Submenu, db_session).list_read(
+        **submenu_filters,
+    )
+    dishes = await BaseDbService(Dish, db_session).list_read(where=dish_where)
+
+    submenu_dishes: dict[UUID4, list[DishRead]] = defaultdict(list)
+    for dish in dishes:
+        submenu_dishes[dish["submenu_id"]].append(DishRead.parse_obj(dish))
+    menu_submenus: dict[UUID4, list[SubmenuTree]] = defaultdict(list)
+    for submenu in submenus:
+        menu_submenus[submenu["menu_id"]].append(
+            SubmenuTree(**submenu, dishes=submenu_dishes[submenu["id"]]),
+        )
+    return [MenuTree(**menu, submenus=menu_submenus[menu["id"]]) for menu in menus]
@@ -0,0 +1,35 @@
+import base64
+import datetime
+import json
+import uuid
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+Cursor = tuple[datetime.datetime, uuid.UUID]
+
+
+def encode_cursor(item: dict) -> str:
+    """
+    The encode_cursor function returns an opaque cursor of the list page,
+    which encodes the ordering key (creation time and id) of its last item.
+    """
+    key = [item["created_at"].isoformat(), str(item["id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    The decode_cursor function returns the ordering key encoded in the
+    cursor, or raises an HTTP 400 error if the cursor is malformed.
+    """
+    try:
+        created_at, id_ = json.loads(base64.urlsafe_b64decode(cursor))
+        if not isinstance(created_at, str) or not isinstance(id_, str):
+            raise TypeError("cursor parts must be strings")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor",
+        )
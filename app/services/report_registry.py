@@ -0,0 +1,104 @@
+import asyncio
+import datetime
+import json
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator
+
+from aioredis import Redis
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.services.base_cache_service import COMPARE_AND_DELETE_SCRIPT
+from app.services.cache_keys import report_key
+from app.services.catalog_version import catalog_version, set_default
+from app.services.reports import report_status, set_report_status
+from app.tasks.tasks import generate_menu_xlsx
+
+
+def report_path(task_id: str) -> str:
+    """The report_path function returns the path of the report file."""
+    return os.path.join(settings.FILES_DIR, f"{task_id}.xlsx")
+
+
+async def request_menus_report(cache: Redis) -> tuple[dict, bool]:
+    """
+    The request_menus_report function returns info of the menus report task
+    of the current catalog version and whether the report file is ready.
+    The first request of a version queues a new task, the following ones get
+    the same task, finished or in progress. The task is kept for
+    REPORT_TASK_TIMEOUT seconds until its file is written, then for
+    REPORT_CACHE_TIME seconds, see run_menus_report. Failed tasks are
+    replaced with new ones.
+    """
+    key = report_key(await catalog_version(cache))
+    task_id, created = await set_default(
+        cache,
+        key,
+        str(uuid.uuid4()),
+        ex=settings.REPORT_TASK_TIMEOUT,
+    )
+    if created:
+        await set_report_status(cache, task_id, "PENDING")
+        generate_menu_xlsx.apply_async(
+            args=[datetime.datetime.utcnow().isoformat(), key],
+            task_id=task_id,
+        )
+        return await report_status(cache, task_id), False
+    if os.path.exists(report_path(task_id)):
+        return {
+            "task_id": task_id,
+            "task_status": "SUCCESS",
+            "task_result": task_id,
+        }, True
+    info = await report_status(cache, task_id)
+    if info["task_status"] == "FAILURE":
+        await cache.eval(COMPARE_AND_DELETE_SCRIPT, 1, key, task_id)
+        return await request_menus_report(cache)
+    return info, False
+
+
+def sse_event(event: str, data: dict) -> str:
+    """The sse_event function encodes the Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def report_events(
+    cache: Redis,
+    task_id: str,
+    download_url: str,
+) -> AsyncIterator[str]:
+    """
+    The report_events function streams status changes of the report task as
+    Server-Sent Events. The stream ends with a ready event with the download
+    URL of the report, a failed event, or a timeout event after
+    REPORT_EVENTS_TIMEOUT seconds. The task status saved by the worker is
+    read from the cache every REPORT_EVENTS_INTERVAL seconds, between reads
+    comments keep the connection alive.
+    """
+    deadline = time.monotonic() + settings.REPORT_EVENTS_TIMEOUT
+    last_status = None
+    while True:
+        if os.path.exists(report_path(task_id)):
+            yield sse_event(
+                "ready",
+                {
+                    "task_id": task_id,
+                    "task_status": "SUCCESS",
+                    "download_url": download_url,
+                },
+            )
+            return
+        info = await report_status(cache, task_id)
+        if info["task_status"] != last_status:
+            last_status = info["task_status"]
+            yield sse_event("status", jsonable_encoder(info))
+        if last_status in ("FAILURE", "REVOKED"):
+            yield sse_event("failed", jsonable_encoder(info))
+            return
+        if time.monotonic() >= deadline:
+            yield sse_event("timeout", {"task_id": task_id})
+            return
+        await asyncio.sleep(settings.REPORT_EVENTS_INTERVAL)
+        yield ": keep-alive\n\n"
@@ -1,36 +1,165 @@
+import datetime
+import json
+import os
+from collections.abc import AsyncIterator
+
+from aioredis import Redis
+from sqlalchemy import and_, select, true
+from sqlalchemy.sql import Select
+from sqlmodel import col
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.models import Menu
-from app.services.menu import MenuModelService
-
-
-async def get_menus_report_data(db_session: AsyncSession) -> list[dict]:
-    """
-    The get_menus_report_data function returns a json compatible list of
-    dictionaries, related to Menu, Submenu and Dish models data.
-    """
-    db_service = MenuModelService(Menu, db_session)
-    menus_list = await db_service.list()
-    menus_report_data = [
-        {
-            "title": menu.title,
-            "description": menu.description,
-            "submenus": [
-                {
-                    "title": submenu.title,
-                    "description": submenu.description,
-                    "dishes": [
-                        {
-                            "title": dish.title,
-                            "description": dish.description,
-                            "price": str(dish.price),
-                        }
-                        for dish in submenu.dishes
-                    ],
-                }
-                for submenu in menu.submenus
-            ],
-        }
-        for menu in menus_list
-    ]
-    return menus_report_data
+from app.core.config import settings
+from app.db.cache import task_cache
+from app.db.database import task_session
+from app.db.models import Dish, Menu, Submenu
+from app.services.base_cache_service import COMPARE_AND_DELETE_SCRIPT
+from app.services.cache_keys import report_status_key
+from app.services.xlsx_report import CatalogRow, stream_menus_xlsx, stream_report_rows
+
+
+def menus_report_statement(created_before: datetime.datetime | None = None) -> Select:
+    """
+    The menus_report_statement function returns a select statement of flat
+    catalog rows: every dish with its submenu and menu, menus without
+    submenus and submenus without dishes are outer joined. Rows are ordered
+    by menu, submenu and dish creation time, as lists are. Objects created
+    after created_before are skipped, so the rows are a snapshot of the
+    catalog at that time.
+    """
+
+    def created(model: type[Menu | Submenu | Dish]):
+        if created_before is None:
+            return true()
+        return model.created_at <= created_before
+
+    return (
+        select(
+            col(Menu.id).label("menu_id"),
+            col(Menu.title).label("menu_title"),
+            col(Menu.description).label("menu_description"),
+            col(Submenu.id).label("submenu_id"),
+            col(Submenu.title).label("submenu_title"),
+            col(Submenu.description).label("submenu_description"),
+            col(Dish.id).label("dish_id"),
+            col(Dish.title).label("dish_title"),
+            col(Dish.description).label("dish_description"),
+            col(Dish.price).label("dish_price"),
+        )
+        .select_from(Menu)
+        .outerjoin(Submenu, and_(Submenu.menu_id == Menu.id, created(Submenu)))
+        .outerjoin(Dish, and_(Dish.submenu_id == Submenu.id, created(Dish)))
+        .where(created(Menu))
+        .order_by(
+            Menu.created_at,
+            Menu.id,
+            Submenu.created_at,
+            Submenu.id,
+            Dish.created_at,
+            Dish.id,
+        )
+    )
+
+
+async def menus_report_rows(
+    db_session: AsyncSession,
+    created_before: datetime.datetime | None = None,
+) -> AsyncIterator[CatalogRow]:
+    """
+    The menus_report_rows function streams flat catalog rows of the menus
+    report with a server-side cursor, REPORT_STREAM_BATCH_SIZE rows are
+    fetched at a time, see menus_report_statement.
+    """
+    result = await db_session.stream(
+        menus_report_statement(created_before).execution_options(
+            yield_per=settings.REPORT_STREAM_BATCH_SIZE,
+        ),
+    )
+    async for row in result.mappings():
+        yield row
+
+
+async def write_menus_report(requested_at: datetime.datetime, path: str) -> None:
+    """
+    The write_menus_report function writes the menus report of the catalog
+    as it was at the time of the report request to the xlsx file. Catalog
+    rows are streamed from the database to the file, so the catalog is never
+    loaded as a whole. It is used by the report task with its own database
+    session, see task_session.
+    """
+    async with task_session() as session:
+        await stream_menus_xlsx(
+            stream_report_rows(menus_report_rows(session, requested_at)),
+            path,
+        )
+
+
+async def set_report_status(
+    cache: Redis,
+    task_id: str,
+    task_status: str,
+    task_result: str | None = None,
+    ex: int | None = None,
+) -> None:
+    """
+    The set_report_status function saves the status of the report task to
+    the cache for ex seconds, REPORT_TASK_TIMEOUT by default.
+    """
+    await cache.set(
+        report_status_key(task_id),
+        json.dumps(
+            {
+                "task_id": task_id,
+                "task_status": task_status,
+                "task_result": task_result,
+            }
+        ),
+        ex=ex or settings.REPORT_TASK_TIMEOUT,
+    )
+
+
+async def report_status(cache: Redis, task_id: str) -> dict:
+    """
+    The report_status function returns the status of the report task saved
+    by the API and the worker. Unknown tasks are PENDING, as Celery reports
+    them.
+    """
+    data = await cache.get(report_status_key(task_id))
+    if data is None:
+        return {"task_id": task_id, "task_status": "PENDING", "task_result": None}
+    return json.loads(data)
+
+
+async def run_menus_report(
+    task_id: str,
+    requested_at: datetime.datetime,
+    path: str,
+    report_key: str | None = None,
+) -> None:
+    """
+    The run_menus_report function writes the menus report of the report
+    task and saves the task status to the cache. The report key of the
+    catalog version is kept for REPORT_CACHE_TIME seconds once the file is
+    written. If the report fails, the key is removed, so the next request
+    queues a new task. The file appears under its name only when it is
+    complete.
+    """
+    async with task_cache() as cache:
+        await set_report_status(cache, task_id, "STARTED")
+        try:
+            await write_menus_report(requested_at, f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+        except Exception as exc:
+            await set_report_status(cache, task_id, "FAILURE", repr(exc))
+            if report_key is not None:
+                await cache.eval(COMPARE_AND_DELETE_SCRIPT, 1, report_key, task_id)
+            raise
+        await set_report_status(
+            cache,
+            task_id,
+            "SUCCESS",
+            task_id,
+            ex=settings.REPORT_CACHE_TIME,
+        )
+        if report_key is not None and await cache.get(report_key) == task_id.encode():
+            await cache.expire(report_key, settings.REPORT_CACHE_TIME)
@@ -0,0 +1,52 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside the process: the
+    first caller runs the function, others await its result.
+    """
+
+    calls: dict[str, asyncio.Future] = field(default_factory=dict)
+
+    def in_flight(self, key: str) -> bool:
+        """Checks if a call with the given key is running."""
+        return key in self.calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs the function once for all concurrent callers of the key. If the
+        caller running the function is cancelled, the others are not: one of
+        them runs the function again.
+        """
+        while (future := self.calls.get(key)) is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark exception as retrieved if there are no other callers
+            future.add_done_callback(lambda fut: fut.exception())
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.calls[key]
+
+
+single_flight = SingleFlight()
@@ -1,13 +1,17 @@
 from aioredis import Redis
 from fastapi import Depends
+from sqlmodel import col
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.cache import get_cache
-from app.db.database import get_session
-from app.db.models import Submenu, SubmenuCreate, SubmenuRead, SubmenuUpdate
+from app.core.config import settings
+from app.db.cache import get_cache, get_local_cache
+from app.db.database import async_session, get_session
+from app.db.local_cache import LocalCache
+from app.db.models import Menu, Submenu, SubmenuCreate, SubmenuRead, SubmenuUpdate
 from app.services.base_cache_service import BaseCacheService
 from app.services.base_crud_service import BaseCRUDService
-from app.services.base_db_service import BaseDbService
+from app.services.base_db_service import BaseDbService, Counters
+from app.services.cache_keys import SUBMENU_SCOPE
 
 
 class SubmenuModelService(
@@ -15,7 +19,21 @@ class SubmenuModelService(
 ):
     """Model Service class for Submenu."""
 
-    pass
+    async def update_counters(self, submenu: Submenu, sign: int) -> Counters:
+        """
+        The update_counters function updates submenus and dishes counters
+        of the parent menu and returns their new values. Dishes of a deleted
+        submenu are subtracted by its dishes count, which is returned by the
+        delete statement.
+        """
+        values = {"submenus_count": Menu.submenus_count + sign}
+        if sign < 0:
+            values["dishes_count"] = Menu.dishes_count - submenu.dishes_count
+        return await self.update_parent_counters(
+            Menu,
+            col(Menu.id) == submenu.menu_id,
+            **values,
+        )
 
 
 class SubmenuCRUDService(
@@ -23,21 +41,12 @@ class SubmenuCRUDService(
 ):
     """CRUD service class for Submenu"""
 
-    def process_db_data(self, submenu: Submenu):
-        """
-        The process_db_data function takes in a ModelType object and returns
-        the data in that object as a dictionary. This function is used to
-        convert the database data into JSON format and add required fields.
-        """
-        data = {
-            **submenu.dict(),
-            "dishes_count": submenu.dishes.__len__(),
-        }
-        return self.read_model.parse_obj(data)
+    pass
 
 
 async def get_submenu_service(
     cache: Redis = Depends(get_cache),
+    local_cache: LocalCache | None = Depends(get_local_cache),
     db_session: AsyncSession = Depends(get_session),
 ) -> SubmenuCRUDService:
     """
@@ -46,9 +55,12 @@ async def get_submenu_service(
     and returns an instance of the SubmenuCRUDService class, which allows for
     CRUD operations on the submenus table in the database.
     """
+    cache_service = BaseCacheService(cache, local_cache)
     return SubmenuCRUDService(
-        cache=BaseCacheService(cache),
-        db_service=SubmenuModelService(Submenu, db_session),
+        cache=cache_service,
+        db_service=SubmenuModelService(Submenu, db_session, cache_service),
         read_model=SubmenuRead,
-        items_cache_list="submenus_list",
+        cache_scope=SUBMENU_SCOPE,
+        soft_ttl=settings.SUBMENU_CACHE_SOFT_TTL,
+        session_factory=async_session,
     )
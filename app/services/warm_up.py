@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.db.models import Dish, DishRead, Menu, MenuRead, Submenu, SubmenuRead
+from app.services.base_cache_service import BaseCacheService
+from app.services.cache_keys import (
+    CATALOG_VERSION_KEY,
+    DISH_SCOPE,
+    MENU_SCOPE,
+    SUBMENU_SCOPE,
+    WARM_UP_KEY,
+    CacheScope,
+)
+from app.services.catalog_version import catalog_version
+from app.services.dish import DishModelService
+from app.services.menu import MenuModelService
+from app.services.pagination import encode_cursor
+from app.services.submenu import SubmenuModelService
+
+logger = logging.getLogger(__name__)
+
+warm_up_task: asyncio.Task | None = None
+
+
+async def warm_up_cache(
+    db_session: AsyncSession,
+    cache: BaseCacheService,
+) -> dict[str, int]:
+    """
+    The warm_up_cache function preloads all menus, submenus and dishes with
+    their counters and the first page of the list of every parent object into
+    the cache. It takes three queries and one cache round-trip, and returns
+    the numbers of cached objects.
+
+    Only missing keys are set, so entries cached by requests are kept. If the
+    catalog version changes while the catalog is read, a write could have
+    invalidated the read entries, so nothing is set and zeros are returned.
+    Children created between the queries have no parent read, they are
+    skipped, as the catalog version has changed anyway.
+    Once warmed up, the catalog version is saved to WARM_UP_KEY.
+    """
+    version = await catalog_version(cache.cache)
+    menus = await MenuModelService(Menu, db_session).list_read()
+    submenus = await SubmenuModelService(Submenu, db_session).list_read()
+    dishes = await DishModelService(Dish, db_session).list_read()
+
+    groups: dict[tuple[str, ...], dict[str, Any]] = defaultdict(dict)
+    lists: dict[str, tuple[CacheScope, dict[str, str], list[dict]]] = {
+        MENU_SCOPE.list_key(): (MENU_SCOPE, {}, []),
+    }
+    menu_ids: dict[str, str] = {}
+    for menu in menus:
+        menu_id = str(menu["id"])
+        groups[()][MENU_SCOPE.item_key(menu_id)] = MenuRead.parse_obj(menu)
+        lists[MENU_SCOPE.list_key()][2].append(menu)
+        parent_ids = {"menu_id": menu_id}
+        lists[SUBMENU_SCOPE.list_key(**parent_ids)] = (SUBMENU_SCOPE, parent_ids, [])
+    for submenu in submenus:
+        parent_ids = {"menu_id": str(submenu["menu_id"])}
+        if SUBMENU_SCOPE.list_key(**parent_ids) not in lists:
+            continue
+        submenu_id = str(submenu["id"])
+        menu_ids[submenu_id] = parent_ids["menu_id"]
+        tags = tuple(SUBMENU_SCOPE.tree_tags(**parent_ids))
+        groups[tags][SUBMENU_SCOPE.item_key(submenu_id)] = SubmenuRead.parse_obj(
+            submenu,
+        )
+        lists[SUBMENU_SCOPE.list_key(**parent_ids)][2].append(submenu)
+        dish_parent_ids = {"submenu_id": submenu_id, **parent_ids}
+        lists[DISH_SCOPE.list_key(**dish_parent_ids)] = (
+            DISH_SCOPE,
+            dish_parent_ids,
+            [],
+        )
+    for dish in dishes:
+        submenu_id = str(dish["submenu_id"])
+        if submenu_id not in menu_ids:
+            continue
+        parent_ids = {"menu_id": menu_ids[submenu_id], "submenu_id": submenu_id}
+        tags = tuple(DISH_SCOPE.tree_tags(**parent_ids))
+        groups[tags][DISH_SCOPE.item_key(dish["id"])] = DishRead.parse_obj(dish)
+        lists[DISH_SCOPE.list_key(**parent_ids)][2].append(dish)
+    limit = settings.PAGE_DEFAULT_LIMIT
+    for scope, parent_ids, rows in lists.values():
+        page = rows[:limit]
+        tags = (*scope.tree_tags(**parent_ids), scope.pages_tag(**parent_ids))
+        groups[tags][scope.page_key(None, limit, **parent_ids)] = {
+            "ids": [str(row["id"]) for row in page],
+            "next": encode_cursor(page[-1]) if len(rows) > limit else None,
+        }
+
+    if not await cache.set_groups(
+        groups,
+        nx=True,
+        unchanged={CATALOG_VERSION_KEY: version.encode()},
+    ):
+        return {"menus": 0, "submenus": 0, "dishes": 0}
+    await cache.cache.set(WARM_UP_KEY, version, ex=settings.REDIS_CACHE_TIME)
+    return {"menus": len(menus), "submenus": len(submenus), "dishes": len(dishes)}
+
+
+async def run_warm_up(cache: BaseCacheService) -> None:
+    """
+    The run_warm_up function warms up the cache with a new database session
+    and logs the result. Failures are logged only, as the cache is filled by
+    requests anyway. Nodes starting at once warm up the cache under the
+    distributed lock, it is skipped if the lock is held by another node or
+    the current catalog version is already warmed up.
+    """
+    try:
+        async with cache.lock(WARM_UP_KEY) as acquired:
+            if not acquired:
+                logger.info("Cache warm-up is run by another node")
+                return
+            version = await catalog_version(cache.cache)
+            if await cache.cache.get(WARM_UP_KEY) == version.encode():
+                logger.info("Cache is already warmed up")
+                return
+            async with async_session() as session:
+                counts = await warm_up_cache(session, cache)
+        logger.info("Cache warmed up: %s", counts)
+    except Exception:
+        logger.exception("Cache warm-up failed")
+
+
+def start_warm_up(cache: BaseCacheService) -> None:
+    """
+    The start_warm_up function starts the cache warm-up in the background,
+    the app is not ready until it is finished.
+    """
+    global warm_up_task
+    warm_up_task = asyncio.create_task(run_warm_up(cache))
+
+
+def is_ready() -> bool:
+    """The is_ready function returns whether the cache warm-up is finished."""
+    return warm_up_task is None or warm_up_task.done()
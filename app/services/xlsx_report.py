@@ -0,0 +1,198 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle
+from openpyxl.workbook import Workbook
+
+from app.core.config import ExcelStyle, settings
+
+REPORT_TITLE = "Меню"
+ReportRow = tuple[NamedStyle, list]
+CatalogRow = Mapping[str, Any]
+
+
+@dataclass
+class ReportRowsBuilder:
+    """
+    Builds rows of the menus report from flat catalog rows: a row of a dish
+    with its submenu and menu, ordered by menu, submenu and dish. Menus
+    without submenus and submenus without dishes come with empty submenu and
+    dish columns. Only positions of the current menu, submenu and dish are
+    kept, so rows are built as catalog rows arrive.
+    """
+
+    menu_id: Any = None
+    submenu_id: Any = None
+    menu_num: int = 0
+    submenu_num: int = 0
+    dish_num: int = 0
+
+    def build(self, row: CatalogRow) -> Iterator[ReportRow]:
+        """
+        The build function yields report rows of the catalog row with their
+        styles: a menu row and a submenu row when they change, then a dish
+        row.
+        """
+        if row["menu_id"] != self.menu_id:
+            self.menu_id, self.submenu_id = row["menu_id"], None
+            self.menu_num, self.submenu_num = self.menu_num + 1, 0
+            yield ExcelStyle.Header, [
+                self.menu_num,
+                row["menu_title"],
+                row["menu_description"],
+            ]
+        if row["submenu_id"] is not None and row["submenu_id"] != self.submenu_id:
+            self.submenu_id = row["submenu_id"]
+            self.submenu_num, self.dish_num = self.submenu_num + 1, 0
+            yield ExcelStyle.BaseBold, [
+                None,
+                self.submenu_num,
+                row["submenu_title"],
+                row["submenu_description"],
+            ]
+        if row["dish_id"] is not None:
+            self.dish_num += 1
+            yield ExcelStyle.Base, [
+                None,
+                None,
+                self.dish_num,
+                row["dish_title"],
+                row["dish_description"],
+                row["dish_price"],
+            ]
+
+
+def report_rows(catalog_rows: Iterable[CatalogRow]) -> Iterator[ReportRow]:
+    """
+    The report_rows function yields rows of the menus report with their
+    styles: a menu row, then rows of its submenus, each followed by rows of
+    its dishes, see ReportRowsBuilder.
+    """
+    builder = ReportRowsBuilder()
+    for row in catalog_rows:
+        yield from builder.build(row)
+
+
+async def stream_report_rows(
+    catalog_rows: AsyncIterable[CatalogRow],
+) -> AsyncIterator[ReportRow]:
+    """
+    The stream_report_rows function yields rows of the menus report as
+    catalog rows arrive from the database, see report_rows.
+    """
+    builder = ReportRowsBuilder()
+    async for row in catalog_rows:
+        for report_row in builder.build(row):
+            yield report_row
+
+
+class StreamWorkbook:
+    """
+    Write-only workbook of the menus report: rows are serialized to the file
+    as they are appended, so memory does not grow with the report. Styles are
+    registered once and every style has one row of styled cells, which is
+    filled with values of each appended row.
+    """
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet(REPORT_TITLE)
+        for col, width in ExcelStyle.ColumnWidths.items():
+            self.ws.column_dimensions[col].width = width
+        styles = {
+            ExcelStyle.Header.name: ExcelStyle.FilledHeader,
+            ExcelStyle.BaseBold.name: ExcelStyle.BaseBold,
+            ExcelStyle.Base.name: ExcelStyle.Base,
+        }
+        self.width = len(ExcelStyle.ColumnWidths)
+        self.style_rows = {}
+        for name, style in styles.items():
+            self.wb.add_named_style(style)
+            self.style_rows[name] = [WriteOnlyCell(self.ws) for _ in range(self.width)]
+            for cell in self.style_rows[name]:
+                cell.style = style.name
+
+    def append(self, style: NamedStyle, values: list) -> None:
+        """Appends the row of values with the style to the sheet."""
+        # Appended cells are serialized right away, so they can be reused.
+        row = self.style_rows[style.name]
+        for cell, value in zip(row, values + [None] * (self.width - len(values))):
+            cell.value = value
+        self.ws.append(row)
+
+    def save(self, path: str) -> None:
+        """Saves the workbook to the file."""
+        self.wb.save(path)
+
+
+def write_menus_xlsx_stream(rows: Iterable[ReportRow], path: str) -> None:
+    """
+    The write_menus_xlsx_stream function writes the menus report rows with
+    a write-only workbook, see StreamWorkbook.
+    """
+    workbook = StreamWorkbook()
+    for style, values in rows:
+        workbook.append(style, values)
+    workbook.save(path)
+
+
+def write_menus_xlsx_in_memory(rows: Iterable[ReportRow], path: str) -> None:
+    """
+    The write_menus_xlsx_in_memory function builds the whole menus report in
+    a regular workbook and saves it. Every cell is styled separately.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = REPORT_TITLE
+    for col, width in ExcelStyle.ColumnWidths.items():
+        ws.column_dimensions[col].width = width
+
+    for row, (style, values) in enumerate(rows, 1):
+        for col_number in range(1, len(ExcelStyle.ColumnWidths) + 1):
+            ws.cell(row, col_number).style = style
+            if style is ExcelStyle.Header:
+                ws.cell(row, col_number).fill = ExcelStyle.GreyFill
+        for col_number, value in enumerate(values, 1):
+            if value is not None:
+                ws.cell(row, col_number).value = value
+    wb.save(path)
+
+
+def write_menus_xlsx(
+    rows: Iterable[ReportRow],
+    path: str,
+    write_only: bool | None = None,
+) -> None:
+    """
+    The write_menus_xlsx function writes the menus report rows to the xlsx
+    file, streaming them if REPORT_XLSX_WRITE_ONLY.
+    """
+    if write_only is None:
+        write_only = settings.REPORT_XLSX_WRITE_ONLY
+    if write_only:
+        write_menus_xlsx_stream(rows, path)
+    else:
+        write_menus_xlsx_in_memory(rows, path)
+
+
+async def stream_menus_xlsx(
+    rows: AsyncIterable[ReportRow],
+    path: str,
+    write_only: bool | None = None,
+) -> None:
+    """
+    The stream_menus_xlsx function writes the menus report rows to the xlsx
+    file as they arrive, see write_menus_xlsx. The in-memory workbook gets
+    all rows at once.
+    """
+    if write_only is None:
+        write_only = settings.REPORT_XLSX_WRITE_ONLY
+    if not write_only:
+        write_menus_xlsx_in_memory([row async for row in rows], path)
+        return
+    workbook = StreamWorkbook()
+    async for style, values in rows:
+        workbook.append(style, values)
+    workbook.save(path)
@@ -0,0 +1,107 @@
+"""
+Cache codecs micro-benchmark.
+
+Compares encode/decode time and size of the cache codecs on cached values
+of a realistic menu tree: menus list, submenus list and dishes list.
+
+Usage:
+    python -m benchmarks.cache_codecs [--dishes 1000] [--number 200]
+"""
+import argparse
+import time
+import timeit
+import uuid
+from decimal import Decimal
+from typing import Any
+
+from app.db.models import DishRead, MenuRead, SubmenuRead
+from app.services.cache_codecs import (
+    CacheCodec,
+    CompressedCodec,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    zstandard,
+)
+
+
+def make_values(dishes: int) -> dict[str, dict[str, Any]]:
+    """Makes cache envelopes of menus, submenus and dishes lists."""
+    menus = [
+        MenuRead(
+            id=uuid.uuid4(),
+            title=f"Menu {num}",
+            description=f"Description of menu {num} " * 3,
+            submenus_count=10,
+            dishes_count=dishes // 10,
+        )
+        for num in range(20)
+    ]
+    submenus = [
+        SubmenuRead(
+            id=uuid.uuid4(),
+            title=f"Submenu {num}",
+            description=f"Description of submenu {num} " * 3,
+            dishes_count=dishes // 10,
+        )
+        for num in range(10)
+    ]
+    dishes_list = [
+        DishRead(
+            id=uuid.uuid4(),
+            title=f"Dish {num}",
+            description=f"Ingredients and description of dish {num} " * 4,
+            price=Decimal("12.50") + num,
+        )
+        for num in range(dishes)
+    ]
+    now = time.time()
+    return {
+        name: {"value": value, "delta": 0.01, "expires": now, "stored": now}
+        for name, value in (
+            ("menus", menus),
+            ("submenus", submenus),
+            ("dishes", dishes_list),
+        )
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dishes", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    codecs: dict[str, CacheCodec] = {
+        "json": JsonCodec(),
+        "orjson": OrjsonCodec(),
+        "msgpack": MsgpackCodec(),
+        "orjson+zlib": CompressedCodec(OrjsonCodec(), threshold=4096),
+        "msgpack+zlib": CompressedCodec(MsgpackCodec(), threshold=4096),
+    }
+    if zstandard is not None:
+        codecs["orjson+zstd"] = CompressedCodec(
+            OrjsonCodec(),
+            threshold=4096,
+            algorithm="zstd",
+        )
+
+    values = make_values(args.dishes)
+    print(
+        f"{'value':<10}{'codec':<14}{'size, B':>10}"
+        f"{'encode, us':>12}{'decode, us':>12}"
+    )
+    for value_name, value in values.items():
+        for codec_name, codec in codecs.items():
+            data = codec.encode(value)
+            encode = timeit.timeit(lambda: codec.encode(value), number=args.number)
+            decode = timeit.timeit(lambda: codec.decode(data), number=args.number)
+            print(
+                f"{value_name:<10}{codec_name:<14}{len(data):>10}"
+                f"{encode / args.number * 1e6:>12.1f}"
+                f"{decode / args.number * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
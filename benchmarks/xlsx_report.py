@@ -0,0 +1,96 @@
+"""
+Menus report xlsx writers benchmark.
+
+Compares time and peak memory of the streaming (write-only) and in-memory
+report writers on generated catalogs: 10 menus of 10 submenus each with the
+given total number of dishes. Catalog rows are generated lazily, as the
+report task streams them from the database, so the peak memory includes the
+report data. Time and memory are measured in separate runs, as tracing
+allocations slows the writers down.
+
+Usage:
+    python -m benchmarks.xlsx_report [--dishes 10000 100000 1000000]
+        [--writers stream memory]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+
+from app.services.xlsx_report import (
+    CatalogRow,
+    report_rows,
+    write_menus_xlsx_in_memory,
+    write_menus_xlsx_stream,
+)
+
+WRITERS = {
+    "stream": write_menus_xlsx_stream,
+    "memory": write_menus_xlsx_in_memory,
+}
+
+
+def make_catalog_rows(
+    dishes: int,
+    menus: int = 10,
+    submenus: int = 10,
+) -> Iterator[CatalogRow]:
+    """Yields flat report rows of a catalog with the total number of dishes."""
+    per_submenu = max(dishes // (menus * submenus), 1)
+    for menu in range(menus):
+        for submenu in range(submenus):
+            for dish in range(per_submenu):
+                yield {
+                    "menu_id": menu,
+                    "menu_title": f"Menu {menu}",
+                    "menu_description": f"Description of menu {menu}",
+                    "submenu_id": submenu,
+                    "submenu_title": f"Submenu {submenu}",
+                    "submenu_description": f"Description of submenu {submenu}",
+                    "dish_id": dish,
+                    "dish_title": f"Dish {dish}",
+                    "dish_description": f"Ingredients of dish {dish} " * 4,
+                    "dish_price": f"{12.5 + dish:.2f}",
+                }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dishes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 1000000],
+    )
+    parser.add_argument(
+        "--writers",
+        nargs="+",
+        choices=list(WRITERS),
+        default=list(WRITERS),
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'dishes':>10}  {'writer':<8}{'time, s':>10}{'peak, MB':>10}{'size, MB':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.xlsx")
+        for dishes in args.dishes:
+            for name in args.writers:
+                start = time.perf_counter()
+                WRITERS[name](report_rows(make_catalog_rows(dishes)), path)
+                elapsed = time.perf_counter() - start
+                tracemalloc.start()
+                WRITERS[name](report_rows(make_catalog_rows(dishes)), path)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(
+                    f"{dishes:>10}  {name:<8}{elapsed:>10.2f}"
+                    f"{peak / 2**20:>10.1f}{os.path.getsize(path) / 2**20:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
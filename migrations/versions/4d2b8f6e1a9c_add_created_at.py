@@ -0,0 +1,47 @@
+"""add created_at for keyset pagination
+
+Revision ID: 4d2b8f6e1a9c
+Revises: 9c1e2a7d4b3f
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4d2b8f6e1a9c"
+down_revision = "9c1e2a7d4b3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("menu", "submenu", "dish"):
+        op.add_column(
+            table,
+            sa.Column(
+                "created_at",
+                sa.DateTime(),
+                server_default=sa.func.now(),
+                nullable=False,
+            ),
+        )
+    op.create_index("ix_menu_created_at_id", "menu", ["created_at", "id"])
+    op.create_index(
+        "ix_submenu_menu_id_created_at_id",
+        "submenu",
+        ["menu_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_dish_submenu_id_created_at_id",
+        "dish",
+        ["submenu_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dish_submenu_id_created_at_id", table_name="dish")
+    op.drop_index("ix_submenu_menu_id_created_at_id", table_name="submenu")
+    op.drop_index("ix_menu_created_at_id", table_name="menu")
+    for table in ("dish", "submenu", "menu"):
+        op.drop_column(table, "created_at")
@@ -0,0 +1,71 @@
+"""add submenus and dishes counters
+
+Revision ID: 9c1e2a7d4b3f
+Revises: 6ffd74571f47
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c1e2a7d4b3f"
+down_revision = "6ffd74571f47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "menu",
+        sa.Column(
+            "submenus_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "menu",
+        sa.Column(
+            "dishes_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "submenu",
+        sa.Column(
+            "dishes_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        UPDATE submenu SET dishes_count = (
+            SELECT count(dish.id) FROM dish WHERE dish.submenu_id = submenu.id
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE menu SET
+            submenus_count = (
+                SELECT count(submenu.id) FROM submenu
+                WHERE submenu.menu_id = menu.id
+            ),
+            dishes_count = (
+                SELECT coalesce(sum(submenu.dishes_count), 0) FROM submenu
+                WHERE submenu.menu_id = menu.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("submenu", "dishes_count")
+    op.drop_column("menu", "dishes_count")
+    op.drop_column("menu", "submenus_count")
@@ -0,0 +1,38 @@
+"""delete children by ON DELETE CASCADE foreign keys
+
+Revision ID: b7e3c9a15f20
+Revises: 4d2b8f6e1a9c
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e3c9a15f20"
+down_revision = "4d2b8f6e1a9c"
+branch_labels = None
+depends_on = None
+
+FOREIGN_KEYS = (
+    ("submenu_menu_id_fkey", "submenu", "menu", "menu_id"),
+    ("dish_submenu_id_fkey", "dish", "submenu", "submenu_id"),
+)
+
+
+def upgrade() -> None:
+    for name, table, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name,
+            table,
+            referent,
+            [column],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+
+def downgrade() -> None:
+    for name, table, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(name, table, referent, [column], ["id"])
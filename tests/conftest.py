@@ -6,7 +6,9 @@ from typing import Any
 
 import pytest
 import pytest_asyncio
+from aioredis.exceptions import ResponseError, WatchError
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
@@ -14,10 +16,75 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
 
 from app.core.config import BASEDIR
-from app.db.cache import get_cache
+from app.db.cache import get_cache, get_local_cache
 from app.db.database import get_session
+from app.db.local_cache import LocalCache
 from app.db.models import Dish, Menu, Submenu
 from app.main import app
+from app.services.counters import repair_counters
+
+
+def to_bytes(value: Any) -> bytes:
+    """Converts a value to bytes as Redis does."""
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+@dataclass
+class FakePipeline:
+    """
+    Fake cache pipeline, it runs buffered commands on execute. Commands
+    issued after watch and before multi run immediately, execute raises
+    WatchError if watched keys are changed.
+    """
+
+    cache: "FakeCacheService"
+    commands: list = field(default_factory=list)
+    watched: dict = field(default_factory=dict)
+    explicit_transaction: bool = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.reset()
+
+    def __getattr__(self, name: str):
+        if self.watched and not self.explicit_transaction:
+            return getattr(self.cache, name)
+
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    async def watch(self, *keys: str):
+        """Watches the keys for changes, Redis requires at least one key."""
+        if not keys:
+            raise ResponseError("wrong number of arguments for 'watch' command")
+        self.watched = {key: self.cache.storage.get(key) for key in keys}
+
+    def multi(self):
+        """Starts buffering of transaction commands."""
+        self.explicit_transaction = True
+
+    async def reset(self):
+        """Resets the pipeline state."""
+        self.commands, self.watched = [], {}
+        self.explicit_transaction = False
+
+    async def execute(self):
+        """Runs buffered commands and returns their results."""
+        self.cache.round_trips += 1
+        watched = self.watched
+        commands = self.commands
+        await self.reset()
+        if any(self.cache.storage.get(key) != data for key, data in watched.items()):
+            raise WatchError("Watched variable changed")
+        return [
+            await getattr(self.cache, name)(*args, **kwargs)
+            for name, args, kwargs in commands
+        ]
 
 
 @dataclass
@@ -25,18 +92,58 @@ class FakeCacheService:
     """Fake cache service."""
 
     storage: dict = field(default_factory=dict)
+    published: list = field(default_factory=list)
+    round_trips: int = 0
+
+    def pipeline(self, transaction: bool = True):
+        """Returns a pipeline of the cache."""
+        return FakePipeline(self)
 
-    async def set(self, key: str, value: Any, **kwargs):
+    async def set(self, key: str, value: Any, nx: bool = False, **kwargs):
         """Sets an object to the cache."""
-        self.storage[key] = value
+        if nx and key in self.storage:
+            return None
+        self.storage[key] = to_bytes(value)
+        return True
 
     async def get(self, key: str):
         """Gets an object from the cache."""
         return self.storage.get(key)
 
-    async def delete(self, key: str):
-        """Removes an object from the cache."""
-        return self.storage.pop(key, None)
+    async def mget(self, keys: list[str]):
+        """Gets objects of the keys from the cache."""
+        return [self.storage.get(key) for key in keys]
+
+    async def delete(self, *keys: str):
+        """Removes objects from the cache."""
+        return len([self.storage.pop(key) for key in keys if key in self.storage])
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: str):
+        """Runs the compare-and-delete script."""
+        key, token = keys_and_args
+        if self.storage.get(key) == to_bytes(token):
+            return await self.delete(key)
+        return 0
+
+    async def unlink(self, *keys: str):
+        """Removes objects from the cache in background."""
+        return await self.delete(*keys)
+
+    async def sadd(self, key: str, *values: str):
+        """Adds values to the set."""
+        self.storage.setdefault(key, set()).update(map(to_bytes, values))
+
+    async def smembers(self, key: str):
+        """Returns members of the set."""
+        return self.storage.get(key, set())
+
+    async def expire(self, key: str, *args, **kwargs):
+        """Sets expiration time to the key."""
+        pass
+
+    async def publish(self, channel: str, message: str):
+        """Publishes a message to the channel."""
+        self.published.append((channel, message))
 
 
 @pytest_asyncio.fixture
@@ -56,6 +163,13 @@ async def session_db_override(test_session) -> None:
     app.dependency_overrides[get_session] = get_test_session
 
 
+def enable_foreign_keys(dbapi_connection, connection_record) -> None:
+    """Enables foreign keys, SQLite ignores ON DELETE CASCADE otherwise."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def test_session() -> AsyncSession:
     async_engine = create_async_engine(
@@ -63,6 +177,7 @@ async def test_session() -> AsyncSession:
         poolclass=StaticPool,
         future=True,
     )
+    event.listen(async_engine.sync_engine, "connect", enable_foreign_keys)
     async_session = sessionmaker(
         async_engine,
         class_=AsyncSession,
@@ -95,6 +210,19 @@ async def test_cache() -> FakeCacheService:
     return redis
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def local_cache_override(test_local_cache) -> None:
+    def get_test_local_cache() -> LocalCache:
+        return test_local_cache
+
+    app.dependency_overrides[get_local_cache] = get_test_local_cache
+
+
+@pytest.fixture(scope="function")
+def test_local_cache() -> LocalCache:
+    return LocalCache(maxsize=100, ttl=60)
+
+
 @pytest.fixture(autouse=True)
 def reset_dependency_overrides() -> Generator:
     yield
@@ -133,4 +261,5 @@ async def initial_db_data(test_session: AsyncSession) -> dict:
         dish = Dish(**db_data["fill_dish_m2"][dish])
         test_session.add(dish)
         await test_session.commit()
+    await repair_counters(test_session)
     return db_data
@@ -1,3 +1,5 @@
+import base64
+
 import pytest
 from httpx import AsyncClient
 from sqlmodel import select
@@ -85,3 +87,72 @@ class TestDish(BaseApiCRUDTests):
     name: str = "dish"
     required_fields: tuple = ("title", "description", "price")
     db_table = Dish
+
+    async def test_mismatched_parents(self, async_client: AsyncClient):
+        """Test that dish path with a submenu of another menu is rejected."""
+        other_menu_id = "f47d47e4-efb5-4700-8147-ddcc5987b1fa"
+        dish_id = "ce3d3b68-4075-44b2-8343-74e863ea83f0"
+        url = (
+            f"{settings.API_V1_STR}/menus/{other_menu_id}/submenus/"
+            f"{self.submenu_id}/dishes/"
+        )
+        for path in (url, f"{url}{dish_id}"):
+            response = await async_client.get(path)
+            assert (
+                response.status_code == 404
+            ), "Check that submenu of another menu is not found"
+            assert response.json() == {"detail": "submenu not found"}
+
+        response = await async_client.get(f"{self.url}{dish_id}")
+        assert response.status_code == 200, "Check that matching path is valid"
+
+    async def test_malformed_path_ids(self, async_client: AsyncClient):
+        """Test that malformed ids of the dish path are validation errors."""
+        menu_response = await async_client.get(f"{settings.API_V1_STR}/menus/bad")
+        assert menu_response.status_code == 422
+        urls = {
+            "submenu_id": self.url.replace(self.submenu_id, "bad"),
+            "item_id": f"{self.url}bad",
+        }
+        for param, url in urls.items():
+            response = await async_client.get(url)
+            assert (
+                response.status_code == 422
+            ), f"Check that malformed '{param}' is a validation error"
+            assert response.json()["detail"] == [
+                {**menu_response.json()["detail"][0], "loc": ["path", param]}
+            ], "Check that the error matches path parameter errors"
+
+    async def test_pagination(self, async_client: AsyncClient, initial_db_data: dict):
+        """Test that lists are paginated with the next page cursor."""
+        expected = [item["id"] for item in (await async_client.get(self.url)).json()]
+        assert len(expected) > 1, "Check that initial_db_data contains dishes"
+
+        ids: list[str] = []
+        cursor = None
+        while True:
+            params: dict[str, int | str] = {"limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            response = await async_client.get(self.url, params=params)
+            assert response.status_code == 200
+            assert len(response.json()) == 1, "Check that page size is limited"
+            ids.extend(item["id"] for item in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        assert ids == expected, "Check that pages follow the list order"
+
+        response = await async_client.get(self.url, params={"cursor": "broken"})
+        assert response.status_code == 400, "Check that invalid cursor is rejected"
+        wrong_types = base64.urlsafe_b64encode(b'["2020-01-01T00:00:00", 5]')
+        response = await async_client.get(
+            self.url,
+            params={"cursor": wrong_types.decode()},
+        )
+        assert response.status_code == 400, "Check that cursor parts are checked"
+        response = await async_client.get(
+            self.url,
+            params={"limit": settings.PAGE_MAX_LIMIT + 1},
+        )
+        assert response.status_code == 422, "Check that page size is capped"
@@ -0,0 +1,669 @@
+import asyncio
+import json
+import time
+from contextlib import nullcontext
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db import cache
+from app.db.local_cache import LocalCache
+from app.db.models import Dish, Menu, MenuCreate, MenuRead, Submenu
+from app.services import warm_up as warm_up_module
+from app.services.base_cache_service import BaseCacheService, CacheEntry
+from app.services.base_crud_service import background_tasks
+from app.services.cache_keys import (
+    CATALOG_VERSION_KEY,
+    DISH_SCOPE,
+    MENU_SCOPE,
+    SUBMENU_SCOPE,
+    WARM_UP_KEY,
+    missing_key,
+    response_key,
+)
+from app.services.menu import MenuCRUDService, MenuModelService
+from app.services.warm_up import run_warm_up, warm_up_cache
+
+MENU_ID = "f47d47e4-efb5-4700-8147-ddcc5987b1fc"
+MENU2_ID = "f47d47e4-efb5-4700-8147-ddcc5987b1fa"
+SUBMENU_ID = "127c9770-456c-478d-a086-e8e313e64d68"
+SUBMENU2_ID = "127c9770-456c-478d-a086-e8e313e64d69"
+MENUS_URL = f"{settings.API_V1_STR}/menus/"
+
+
+@pytest.mark.asyncio
+async def test_get_cache_shares_pool():
+    """Test that get_cache hands out clients bound to one shared pool."""
+    await cache.open_cache()
+    first = await cache.get_cache()
+    second = await cache.get_cache()
+    assert (
+        first.connection_pool is second.connection_pool is cache.redis_pool
+    ), "Check that Redis clients share the process-wide connection pool"
+
+    await cache.close_cache()
+    assert cache.redis_pool is None, "Check that close_cache releases the pool"
+
+
+@pytest.mark.asyncio
+async def test_list_cache_scoped_by_parent(
+    async_client: AsyncClient,
+    initial_db_data: dict,
+):
+    """Test that lists of different parents are cached under own keys."""
+    for menu_id, check in ((MENU_ID, "check_submenu"), (MENU2_ID, "check_submenu_m2")):
+        response = await async_client.get(f"{MENUS_URL}{menu_id}/submenus/")
+        assert response.json() == list(initial_db_data[check].values()), (
+            f"Check that submenus list of menu {menu_id} is not taken from "
+            "the cached list of another menu"
+        )
+
+
+@pytest.mark.asyncio
+async def test_dish_write_invalidates_hierarchy(
+    async_client: AsyncClient,
+    test_cache,
+    test_data: dict,
+):
+    """Test that dish creation invalidates only its parents cache entries."""
+    submenu_url = f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU_ID}"
+    menu = (await async_client.get(f"{MENUS_URL}{MENU_ID}")).json()
+    await async_client.get(MENUS_URL)
+    await async_client.get(f"{MENUS_URL}{MENU_ID}/submenus/")
+    await async_client.get(f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU2_ID}")
+    await async_client.get(f"{submenu_url}/dishes/")
+    await async_client.get(
+        f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU2_ID}/dishes/",
+    )
+
+    payload = test_data["dish_create"]["payload"]
+    await async_client.post(f"{submenu_url}/dishes/", json=payload)
+
+    menus_page = MENU_SCOPE.page_key(None, settings.PAGE_DEFAULT_LIMIT)
+    submenus_page = SUBMENU_SCOPE.page_key(
+        None,
+        settings.PAGE_DEFAULT_LIMIT,
+        menu_id=MENU_ID,
+    )
+    for key in (
+        response_key(menus_page),
+        MENU_SCOPE.item_key(MENU_ID),
+        response_key(submenus_page),
+        SUBMENU_SCOPE.item_key(SUBMENU_ID),
+        DISH_SCOPE.page_key(
+            None,
+            settings.PAGE_DEFAULT_LIMIT,
+            submenu_id=SUBMENU_ID,
+        ),
+    ):
+        assert key not in test_cache.storage, f"Check that '{key}' is invalidated"
+    for key in (
+        menus_page,
+        submenus_page,
+        SUBMENU_SCOPE.item_key(SUBMENU2_ID),
+        DISH_SCOPE.page_key(
+            None,
+            settings.PAGE_DEFAULT_LIMIT,
+            submenu_id=SUBMENU2_ID,
+        ),
+    ):
+        assert key in test_cache.storage, f"Check that '{key}' is kept"
+
+    response = await async_client.get(f"{MENUS_URL}{MENU_ID}")
+    assert (
+        response.json()["dishes_count"] == menu["dishes_count"] + 1
+    ), "Check that menu counts are reloaded after dish creation"
+
+
+@pytest.mark.asyncio
+async def test_delete_purges_subtree(async_client: AsyncClient, test_cache):
+    """Test that menu deletion purges cached entries of its subtree."""
+    submenu_url = f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU_ID}"
+    await async_client.get(submenu_url)
+    await async_client.get(f"{submenu_url}/dishes/")
+
+    await async_client.delete(f"{MENUS_URL}{MENU_ID}")
+    for key in (
+        SUBMENU_SCOPE.item_key(SUBMENU_ID),
+        DISH_SCOPE.page_key(
+            None,
+            settings.PAGE_DEFAULT_LIMIT,
+            submenu_id=SUBMENU_ID,
+        ),
+    ):
+        assert key not in test_cache.storage, f"Check that '{key}' is purged"
+    response = await async_client.get(submenu_url)
+    assert (
+        response.status_code == 404
+    ), "Check that submenu of deleted menu is not served from cache"
+
+
+def test_local_cache_lru_and_ttl():
+    """Test that in-process cache evicts old entries and expires by TTL."""
+    local_cache = LocalCache(maxsize=2, ttl=60)
+    local_cache.set("a", 1)
+    local_cache.set("b", 2)
+    local_cache.get("a")
+    local_cache.set("c", 3)
+    assert local_cache.get("b") is None, "Check that LRU entry is evicted"
+    assert local_cache.get("a") == 1, "Check that recently used entry is kept"
+
+    local_cache = LocalCache(maxsize=2, ttl=0)
+    local_cache.set("a", 1)
+    assert local_cache.get("a") is None, "Check that expired entry is dropped"
+
+
+@pytest.mark.asyncio
+async def test_local_cache_serves_hot_reads(
+    async_client: AsyncClient,
+    test_cache,
+    test_local_cache: LocalCache,
+):
+    """Test that repeated reads are served from the in-process cache."""
+    url = f"{MENUS_URL}{MENU_ID}"
+    menu = (await async_client.get(url)).json()
+    test_cache.storage.pop(MENU_SCOPE.item_key(MENU_ID))
+
+    assert (
+        await async_client.get(url)
+    ).json() == menu, "Check that menu is served from the in-process cache"
+    assert test_local_cache.hits == 1, "Check that in-process cache is hit"
+
+    await async_client.patch(url, json={"title": "Updated"})
+    channel, message = test_cache.published[-1]
+    assert channel == settings.CACHE_INVALIDATION_CHANNEL and MENU_SCOPE.item_key(
+        MENU_ID
+    ) in (
+        json.loads(message)["keys"]
+    ), "Check that changed keys are broadcast to other nodes"
+
+
+def test_apply_invalidation(test_local_cache: LocalCache):
+    """Test that keys changed by other nodes are removed locally."""
+    test_local_cache.set("a", 1)
+    test_local_cache.set("b", 2)
+    cache.apply_invalidation(
+        test_local_cache,
+        json.dumps({"node": cache.NODE_ID, "keys": ["a"]}),
+    )
+    assert test_local_cache.get("a") == 1, "Check that own messages are skipped"
+
+    cache.apply_invalidation(
+        test_local_cache,
+        json.dumps({"node": "other", "keys": ["a", "b"]}),
+    )
+    assert not test_local_cache.storage, "Check that changed keys are removed"
+
+
+def test_early_expiration():
+    """Test probabilistic early expiration of cache entries."""
+    now = time.time()
+    assert CacheEntry("value", delta=1, expires=now - 1).should_refresh(
+        1.0
+    ), "Check that expired entry is refreshed"
+    assert not CacheEntry("value", delta=0.01, expires=now + 3600).should_refresh(
+        1.0
+    ), "Check that fresh entry is not refreshed"
+    assert not CacheEntry("value", delta=1, expires=now - 1).should_refresh(
+        0
+    ), "Check that early expiration is disabled with zero beta"
+
+
+@pytest.mark.asyncio
+async def test_distributed_lock(async_client: AsyncClient, test_cache, monkeypatch):
+    """Test that cache misses are loaded under the distributed lock."""
+    monkeypatch.setattr(settings, "CACHE_LOCK_WAIT", 0)
+    cache_service = BaseCacheService(test_cache)
+    async with cache_service.lock("key") as acquired:
+        assert acquired, "Check that free lock is acquired"
+        async with cache_service.lock("key") as acquired_twice:
+            assert not acquired_twice, "Check that held lock is not acquired"
+    assert "lock:key" not in test_cache.storage, "Check that lock is released"
+
+    async with cache_service.lock("key") as acquired:
+        test_cache.storage["lock:key"] = b"other-node"
+    assert (
+        test_cache.storage["lock:key"] == b"other-node"
+    ), "Check that expired lock taken by another node is not released"
+
+    monkeypatch.setattr(settings, "CACHE_LOCK_ENABLED", True)
+    response = await async_client.get(f"{MENUS_URL}{MENU_ID}")
+    assert response.status_code == 200, "Check that locked load returns data"
+    assert MENU_SCOPE.item_key(MENU_ID) in test_cache.storage
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(test_session: AsyncSession, test_cache):
+    """Test that stale entries are returned and refreshed in background."""
+    service = MenuCRUDService(
+        cache=BaseCacheService(test_cache),
+        db_service=MenuModelService(Menu, test_session),
+        read_model=MenuRead,
+        cache_scope=MENU_SCOPE,
+        soft_ttl=0,
+        session_factory=lambda: nullcontext(test_session),
+    )
+    menu = await service.get(MENU_ID)
+    await test_session.execute(
+        update(Menu)
+        .where(Menu.id == MENU_ID)
+        .values(title="Changed")
+        .execution_options(synchronize_session=False)
+    )
+    await test_session.commit()
+
+    stale = await service.get(MENU_ID)
+    assert stale["title"] == menu.title, "Check that stale value is returned"
+    await asyncio.gather(*background_tasks)
+    fresh = await service.get(MENU_ID)
+    assert fresh["title"] == "Changed", "Check that value is refreshed in background"
+    await asyncio.gather(*background_tasks)
+
+
+@pytest.mark.asyncio
+async def test_batched_cache_operations(test_cache, test_local_cache):
+    """Test that multi-key cache operations take a single round-trip."""
+    cache_service = BaseCacheService(test_cache, test_local_cache)
+    await cache_service.set_many({"a": 1, "b": 2}, tags=["tag"])
+    assert test_cache.round_trips == 1, "Check that values are set in one trip"
+
+    test_local_cache.clear()
+    values = await cache_service.get_many("a", "b", "c")
+    assert values == [1, 2, None], "Check that values are fetched with MGET"
+
+    await cache_service.write({"c": 3}, deleted=["a"])
+    assert test_cache.round_trips == 2, "Check that write takes one trip"
+    assert await cache_service.get_many("a", "c") == [None, 3]
+
+
+@pytest.mark.asyncio
+async def test_write_in_one_round_trip(async_client: AsyncClient, test_cache):
+    """Test that CRUD writes send all cache changes in one round-trip."""
+    response = await async_client.patch(
+        f"{MENUS_URL}{MENU_ID}",
+        json={"title": "Changed", "description": "Changed"},
+    )
+    assert response.status_code == 200
+    assert (
+        test_cache.round_trips == 2
+    ), "Check that update takes one trip besides the pages lookup"
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(async_client: AsyncClient, test_cache):
+    """Test cached response bodies with ETag and 304 Not Modified."""
+    url = f"{MENUS_URL}{MENU_ID}"
+    response = await async_client.get(url)
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response_key(MENU_SCOPE.item_key(MENU_ID)) in test_cache.storage
+
+    response = await async_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304, "Check that unchanged menu is not sent"
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    list_response = await async_client.get(MENUS_URL)
+    await async_client.patch(url, json={"title": "Changed"})
+    response = await async_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200, "Check that changed menu is sent"
+    assert response.headers["etag"] != etag, "Check that ETag changes"
+    assert response.json()["title"] == "Changed"
+    response = await async_client.get(
+        MENUS_URL,
+        headers={"If-None-Match": list_response.headers["etag"]},
+    )
+    assert response.status_code == 200, "Check that list response is invalidated"
+
+
+@pytest.mark.asyncio
+async def test_cached_counts_from_sql(test_session: AsyncSession, test_cache):
+    """Test that cached menus get their counts without loading the tree."""
+    test_session.expunge_all()
+    service = MenuCRUDService(
+        cache=BaseCacheService(test_cache),
+        db_service=MenuModelService(Menu, test_session),
+        read_model=MenuRead,
+        cache_scope=MENU_SCOPE,
+    )
+    await service.list()
+    await service.get(MENU2_ID)
+    assert not test_session.identity_map, "Check that no ORM objects are loaded"
+
+    submenus = await test_session.execute(
+        select(Submenu.menu_id, func.count()).group_by(Submenu.menu_id)
+    )
+    submenus_counts = {str(menu_id): count for menu_id, count in submenus.all()}
+    dishes = await test_session.execute(
+        select(Submenu.menu_id, func.count())
+        .join(Dish, Dish.submenu_id == Submenu.id)
+        .group_by(Submenu.menu_id)
+    )
+    dishes_counts = {str(menu_id): count for menu_id, count in dishes.all()}
+    assert dishes_counts[MENU_ID] > 0, "Check that test data contains dishes"
+    for menu_id in (MENU_ID, MENU2_ID):
+        cached = await service.cache.get(MENU_SCOPE.item_key(menu_id))
+        assert (cached["submenus_count"], cached["dishes_count"]) == (
+            submenus_counts.get(menu_id, 0),
+            dishes_counts.get(menu_id, 0),
+        ), f"Check that cached counts of '{menu_id}' match the tree"
+
+
+@pytest.mark.asyncio
+async def test_normalized_list_cache(
+    async_client: AsyncClient,
+    test_cache,
+    test_local_cache: LocalCache,
+):
+    """Test that pages are rebuilt from item keys and kept on item update."""
+    page_key = MENU_SCOPE.page_key(None, settings.PAGE_DEFAULT_LIMIT)
+    await async_client.get(MENUS_URL)
+    page = await BaseCacheService(test_cache).get(page_key)
+    assert set(page["ids"]) == {MENU_ID, MENU2_ID}, "Check that page holds ids"
+    assert page["next"] is None
+
+    await async_client.patch(f"{MENUS_URL}{MENU_ID}", json={"title": "Changed"})
+    assert page_key in test_cache.storage, "Check that ids are kept"
+    assert response_key(page_key) not in test_cache.storage
+
+    test_cache.storage.pop(MENU_SCOPE.item_key(MENU2_ID))
+    test_local_cache.delete(MENU_SCOPE.item_key(MENU2_ID))
+    menus = {menu["id"]: menu for menu in (await async_client.get(MENUS_URL)).json()}
+    assert menus[MENU_ID]["title"] == "Changed", "Check that item entry is fresh"
+    assert MENU2_ID in menus, "Check that missed item is loaded from the database"
+    assert MENU_SCOPE.item_key(MENU2_ID) in test_cache.storage
+
+
+@pytest.mark.asyncio
+async def test_write_through(
+    async_client: AsyncClient,
+    test_cache,
+    test_data: dict,
+    monkeypatch,
+):
+    """Test that writes patch cached counters in place and purge pages."""
+    monkeypatch.setattr(settings, "CACHE_WRITE_THROUGH", True)
+    submenus_url = f"{MENUS_URL}{MENU_ID}/submenus/"
+    dishes_url = f"{submenus_url}{SUBMENU_ID}/dishes/"
+    menu = (await async_client.get(f"{MENUS_URL}{MENU_ID}")).json()
+    await async_client.get(f"{submenus_url}{SUBMENU_ID}")
+    dishes = (await async_client.get(dishes_url)).json()
+
+    payload = test_data["dish_create"]["payload"]
+    dish = (await async_client.post(dishes_url, json=payload)).json()
+    for key in (
+        MENU_SCOPE.item_key(MENU_ID),
+        SUBMENU_SCOPE.item_key(SUBMENU_ID),
+    ):
+        assert key in test_cache.storage, f"Check that '{key}' is patched"
+    assert (
+        DISH_SCOPE.page_key(None, settings.PAGE_DEFAULT_LIMIT, submenu_id=SUBMENU_ID)
+        not in test_cache.storage
+    ), "Check that pages of the changed list are purged"
+    response = await async_client.get(f"{MENUS_URL}{MENU_ID}")
+    assert response.json()["dishes_count"] == menu["dishes_count"] + 1
+    response = await async_client.get(dishes_url)
+    assert [item["id"] for item in response.json()] == [
+        *(item["id"] for item in dishes),
+        dish["id"],
+    ], "Check that created dish is appended to the list"
+
+    await async_client.delete(f"{submenus_url}{SUBMENU_ID}")
+    response = await async_client.get(f"{MENUS_URL}{MENU_ID}")
+    assert response.json()["submenus_count"] == menu["submenus_count"] - 1
+    assert response.json()["dishes_count"] == menu["dishes_count"] - len(dishes)
+    assert MENU_SCOPE.item_key(MENU_ID) in test_cache.storage
+
+    payload = test_data["menu_create"]["payload"]
+    response = await async_client.post(MENUS_URL, json=payload)
+    assert response.status_code == 201, "Check that menus without parents work"
+    response = await async_client.delete(f"{MENUS_URL}{response.json()['id']}")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_write_through_missed_parent(
+    async_client: AsyncClient,
+    test_cache,
+    test_local_cache: LocalCache,
+    test_data: dict,
+    monkeypatch,
+):
+    """Test that responses of parents missed in the cache are removed."""
+    monkeypatch.setattr(settings, "CACHE_WRITE_THROUGH", True)
+    menu = (await async_client.get(f"{MENUS_URL}{MENU_ID}")).json()
+    del test_cache.storage[MENU_SCOPE.item_key(MENU_ID)]
+    test_local_cache.delete(MENU_SCOPE.item_key(MENU_ID))
+    assert response_key(MENU_SCOPE.item_key(MENU_ID)) in test_cache.storage
+
+    payload = test_data["submenu_create"]["payload"]
+    await async_client.post(f"{MENUS_URL}{MENU_ID}/submenus/", json=payload)
+    response = await async_client.get(f"{MENUS_URL}{MENU_ID}")
+    assert (
+        response.json()["submenus_count"] == menu["submenus_count"] + 1
+    ), "Check that cached response of the missed parent is not served"
+
+
+@pytest.mark.asyncio
+async def test_write_through_sets_counters(
+    async_client: AsyncClient,
+    test_cache,
+    test_data: dict,
+    monkeypatch,
+):
+    """Test that entries cached after the write are not shifted twice."""
+    monkeypatch.setattr(settings, "CACHE_WRITE_THROUGH", True)
+    dishes_url = f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU_ID}/dishes/"
+    menu = (await async_client.get(f"{MENUS_URL}{MENU_ID}")).json()
+    cache_service = BaseCacheService(test_cache)
+    await cache_service.set(
+        MENU_SCOPE.item_key(MENU_ID),
+        {**menu, "dishes_count": menu["dishes_count"] + 1},
+    )
+
+    payload = test_data["dish_create"]["payload"]
+    await async_client.post(dishes_url, json=payload)
+    cached = await cache_service.get(MENU_SCOPE.item_key(MENU_ID))
+    assert (
+        cached["dishes_count"] == menu["dishes_count"] + 1
+    ), "Check that counters are set to the values of the database"
+
+
+@pytest.mark.asyncio
+async def test_write_through_conflict(test_cache):
+    """Test that concurrently changed keys are invalidated."""
+    cache_service = BaseCacheService(test_cache)
+    await cache_service.set("ids", ["a"])
+
+    def change(ids: list[str]) -> list[str]:
+        test_cache.storage["ids"] = b"changed"
+        return [*ids, "b"]
+
+    test_cache.storage[response_key("ids")] = b"response"
+    assert not await cache_service.write_through({"ids": change})
+    assert "ids" not in test_cache.storage, "Check that conflicting key is removed"
+    assert response_key("ids") not in test_cache.storage
+
+
+@pytest.mark.asyncio
+async def test_negative_cache(
+    async_client: AsyncClient,
+    test_session: AsyncSession,
+    test_cache,
+    test_local_cache: LocalCache,
+):
+    """Test that not found ids are cached until an object is created."""
+    missing_id = "f47d47e4-efb5-4700-8147-ddcc5987b100"
+    url = f"{MENUS_URL}{missing_id}"
+    assert (await async_client.get(url)).status_code == 404
+    assert (await async_client.get(f"{url}/submenus/")).status_code == 404
+    assert missing_key("menu", missing_id) in test_cache.storage
+
+    test_session.add(Menu(id=missing_id, title="Menu", description="Menu"))
+    await test_session.commit()
+    assert (await async_client.get(url)).status_code == 404
+    response = await async_client.get(f"{url}/submenus/")
+    assert response.status_code == 404, "Check that miss is served from cache"
+
+    await test_session.delete(await test_session.get(Menu, missing_id))
+    await test_session.commit()
+    db_service = MenuModelService(
+        Menu,
+        test_session,
+        BaseCacheService(test_cache, test_local_cache),
+    )
+    await db_service.create(
+        MenuCreate(title="Menu", description="Menu"),
+        id=missing_id,
+    )
+    assert missing_key("menu", missing_id) not in test_cache.storage
+    assert (await async_client.get(url)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_warm_up_cache(
+    async_client: AsyncClient,
+    test_session: AsyncSession,
+    test_cache,
+    test_local_cache: LocalCache,
+):
+    """Test that warm-up preloads items and first pages in one round-trip."""
+    urls = (
+        MENUS_URL,
+        f"{MENUS_URL}{MENU_ID}",
+        f"{MENUS_URL}{MENU_ID}/submenus/",
+        f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU_ID}/dishes/",
+        f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU2_ID}/dishes/",
+    )
+    expected = [(await async_client.get(url)).json() for url in urls]
+    test_cache.storage.clear()
+    test_cache.round_trips = 0
+    test_local_cache.clear()
+
+    counts = await warm_up_cache(test_session, BaseCacheService(test_cache))
+    assert counts["menus"] == 2, "Check that all menus are cached"
+    assert (
+        test_cache.round_trips == 2
+    ), "Check that catalog version is read and cache is set in one trip each"
+    limit = settings.PAGE_DEFAULT_LIMIT
+    for key in (
+        MENU_SCOPE.page_key(None, limit),
+        SUBMENU_SCOPE.page_key(None, limit, menu_id=MENU_ID),
+        DISH_SCOPE.page_key(None, limit, submenu_id=SUBMENU2_ID),
+        SUBMENU_SCOPE.item_key(SUBMENU_ID),
+    ):
+        assert key in test_cache.storage, f"Check that '{key}' is preloaded"
+
+    assert [
+        (await async_client.get(url)).json() for url in urls
+    ] == expected, "Check that preloaded entries match loaded ones"
+
+
+@pytest.mark.asyncio
+async def test_warm_up_keeps_writes(
+    test_session: AsyncSession,
+    test_cache,
+    monkeypatch,
+):
+    """Test that warm-up does not overwrite entries changed by writes."""
+    cache_service = BaseCacheService(test_cache)
+    await cache_service.set(MENU_SCOPE.item_key(MENU_ID), {"title": "Cached"})
+    await warm_up_cache(test_session, cache_service)
+    assert await cache_service.get(MENU_SCOPE.item_key(MENU_ID)) == {
+        "title": "Cached"
+    }, "Check that cached entries are kept"
+
+    test_cache.storage.clear()
+    list_read = MenuModelService.list_read
+
+    async def list_read_during_write(self, *args, **kwargs):
+        await cache_service.delete(CATALOG_VERSION_KEY)
+        return await list_read(self, *args, **kwargs)
+
+    monkeypatch.setattr(MenuModelService, "list_read", list_read_during_write)
+    counts = await warm_up_cache(test_session, cache_service)
+    assert counts["menus"] == 0, "Check that warm-up is skipped after a write"
+    assert MENU_SCOPE.item_key(MENU_ID) not in test_cache.storage
+
+
+@pytest.mark.asyncio
+async def test_warm_up_skips_orphans(
+    test_session: AsyncSession,
+    test_cache,
+    monkeypatch,
+):
+    """Test that children created after their parents were read are skipped."""
+
+    async def list_read_before_create(self, *args, **kwargs):
+        return []
+
+    monkeypatch.setattr(MenuModelService, "list_read", list_read_before_create)
+    counts = await warm_up_cache(test_session, BaseCacheService(test_cache))
+    assert counts["menus"] == 0, "Check that no menus are read"
+    assert (
+        SUBMENU_SCOPE.item_key(SUBMENU_ID) not in test_cache.storage
+    ), "Check that submenus without a read menu are skipped"
+    assert not any(
+        key.startswith(DISH_SCOPE.item_key("")) for key in test_cache.storage
+    ), "Check that dishes without a read submenu are skipped"
+
+
+@pytest.mark.asyncio
+async def test_run_warm_up_once(test_cache, monkeypatch):
+    """Test that a warmed up catalog version is not loaded again."""
+    monkeypatch.setattr(settings, "CACHE_LOCK_WAIT", 0)
+    cache_service = BaseCacheService(test_cache)
+    warmed_up = []
+
+    async def warm_up(*args):
+        warmed_up.append(args)
+
+    monkeypatch.setattr(warm_up_module, "warm_up_cache", warm_up)
+    monkeypatch.setattr(warm_up_module, "async_session", nullcontext)
+    test_cache.storage[CATALOG_VERSION_KEY] = b"version"
+    test_cache.storage[WARM_UP_KEY] = b"version"
+    await run_warm_up(cache_service)
+    assert not warmed_up, "Check that warmed up version is skipped"
+
+    async with cache_service.lock(WARM_UP_KEY):
+        del test_cache.storage[WARM_UP_KEY]
+        await run_warm_up(cache_service)
+    assert not warmed_up, "Check that warm-up of another node is skipped"
+
+    await run_warm_up(cache_service)
+    assert len(warmed_up) == 1, "Check that changed version is warmed up"
+
+
+@pytest.mark.asyncio
+async def test_menu_tree(async_client: AsyncClient, test_cache, test_data: dict):
+    """Test that nested menu trees are cached until a write in the tree."""
+    url = f"{MENUS_URL}{MENU_ID}/tree"
+    tree = (await async_client.get(url)).json()
+    submenus = (await async_client.get(f"{MENUS_URL}{MENU_ID}/submenus/")).json()
+    assert [submenu["id"] for submenu in tree["submenus"]] == [
+        submenu["id"] for submenu in submenus
+    ], "Check that tree contains submenus of the menu"
+    dishes_url = f"{MENUS_URL}{MENU_ID}/submenus/{SUBMENU_ID}/dishes/"
+    dishes = (await async_client.get(dishes_url)).json()
+    submenu = next(item for item in tree["submenus"] if item["id"] == SUBMENU_ID)
+    assert submenu["dishes"] == dishes, "Check that tree contains dishes"
+    all_trees = (await async_client.get(f"{MENUS_URL}tree")).json()
+    assert [menu["id"] for menu in all_trees] == [
+        menu["id"] for menu in (await async_client.get(MENUS_URL)).json()
+    ], "Check that all menus tree contains all menus"
+    for key in (MENU_SCOPE.nested_key(MENU_ID), MENU_SCOPE.nested_key()):
+        assert response_key(key) in test_cache.storage
+
+    await async_client.post(dishes_url, json=test_data["dish_create"]["payload"])
+    for key in (MENU_SCOPE.nested_key(MENU_ID), MENU_SCOPE.nested_key()):
+        assert response_key(key) not in test_cache.storage, "Check invalidation"
+    tree = (await async_client.get(url)).json()
+    assert tree["dishes_count"] == len(
+        [dish for submenu in tree["submenus"] for dish in submenu["dishes"]]
+    ), "Check that tree is reloaded with the created dish"
+
+    missing_url = f"{MENUS_URL}f47d47e4-efb5-4700-8147-ddcc5987b100/tree"
+    assert (await async_client.get(missing_url)).status_code == 404
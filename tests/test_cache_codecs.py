@@ -0,0 +1,49 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.db.models import DishRead
+from app.services.cache_codecs import (
+    CompressedCodec,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+)
+
+DISH = DishRead(
+    id=uuid.UUID("ce3d3b68-4075-44b2-8343-74e863ea83f0"),
+    title="Dish",
+    description="Dish description",
+    price=Decimal("12.50"),
+)
+EXPECTED = {
+    "id": "ce3d3b68-4075-44b2-8343-74e863ea83f0",
+    "title": "Dish",
+    "description": "Dish description",
+    "price": "12.50",
+}
+
+
+@pytest.mark.parametrize("codec_class", [JsonCodec, OrjsonCodec, MsgpackCodec])
+def test_codec_round_trip(codec_class):
+    """Test that codecs encode read models to bytes and decode them back."""
+    codec = codec_class()
+    data = codec.encode({"value": [DISH], "delta": 0.5})
+    assert isinstance(data, bytes), "Check that codec encodes to bytes"
+    assert codec.decode(data) == {
+        "value": [EXPECTED],
+        "delta": 0.5,
+    }, "Check that decoded value is JSON compatible"
+
+
+def test_compressed_codec():
+    """Test that only values larger than the threshold are compressed."""
+    codec = CompressedCodec(OrjsonCodec(), threshold=1024)
+    small = codec.encode([DISH])
+    large = codec.encode([DISH] * 100)
+    assert small[:1] == b"\x00", "Check that small value is not compressed"
+    assert large[:1] == b"\x01", "Check that large value is compressed"
+    assert len(large) < len(OrjsonCodec().encode([DISH] * 100))
+    assert codec.decode(small) == [EXPECTED]
+    assert codec.decode(large) == [EXPECTED] * 100
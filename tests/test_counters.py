@@ -0,0 +1,108 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.local_cache import LocalCache
+from app.db.models import Menu, Submenu
+from app.services.base_cache_service import BaseCacheService
+from app.services.counters import check_counters, invalidate_counters, repair_counters
+from tests.conftest import FakeCacheService
+
+MENU_ID = "f47d47e4-efb5-4700-8147-ddcc5987b1fc"
+SUBMENU_ID = "127c9770-456c-478d-a086-e8e313e64d68"
+SUBMENU_URL = f"{settings.API_V1_STR}/menus/{MENU_ID}/submenus/{SUBMENU_ID}"
+
+
+async def get_counters(test_session: AsyncSession) -> tuple[int, int, int]:
+    menu = await test_session.execute(
+        select(Menu.submenus_count, Menu.dishes_count).where(Menu.id == MENU_ID)
+    )
+    submenu = await test_session.execute(
+        select(Submenu.dishes_count).where(Submenu.id == SUBMENU_ID)
+    )
+    return *menu.one(), submenu.scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_writes(
+    async_client: AsyncClient,
+    test_session: AsyncSession,
+    test_data: dict,
+):
+    """Test that counters are updated on dish and submenu create/delete."""
+    submenus_count, dishes_count, submenu_dishes_count = await get_counters(
+        test_session
+    )
+
+    payload = test_data["dish_create"]["payload"]
+    response = await async_client.post(f"{SUBMENU_URL}/dishes/", json=payload)
+    assert await get_counters(test_session) == (
+        submenus_count,
+        dishes_count + 1,
+        submenu_dishes_count + 1,
+    ), "Check that dish creation increments menu and submenu dishes_count"
+
+    await async_client.delete(f"{SUBMENU_URL}/dishes/{response.json()['id']}")
+    assert await get_counters(test_session) == (
+        submenus_count,
+        dishes_count,
+        submenu_dishes_count,
+    ), "Check that dish deletion decrements menu and submenu dishes_count"
+
+    await async_client.delete(SUBMENU_URL)
+    assert await get_counters(test_session) == (
+        submenus_count - 1,
+        dishes_count - submenu_dishes_count,
+        None,
+    ), "Check that submenu deletion subtracts its counters from menu"
+    assert await check_counters(test_session) == {
+        "menus": [],
+        "submenus": [],
+    }, "Check that counters match actual counts after writes"
+
+
+@pytest.mark.asyncio
+async def test_repair_counters(
+    async_client: AsyncClient,
+    test_session: AsyncSession,
+    test_cache: FakeCacheService,
+    test_local_cache: LocalCache,
+):
+    """Test that counters drift is detected, repaired and dropped from cache."""
+    menu_url = f"{settings.API_V1_STR}/menus/{MENU_ID}"
+    dishes_count = (await get_counters(test_session))[1]
+    await test_session.execute(
+        update(Menu)
+        .where(Menu.id == MENU_ID)
+        .values(dishes_count=100)
+        .execution_options(synchronize_session=False)
+    )
+    await test_session.commit()
+    test_session.expunge_all()
+    assert (await async_client.get(menu_url)).json()["dishes_count"] == 100
+
+    drift = await check_counters(test_session)
+    assert [str(row["id"]) for row in drift["menus"]] == [
+        MENU_ID
+    ], "Check that drifted menu counters are found"
+
+    repaired = await repair_counters(test_session)
+    assert await check_counters(test_session) == {
+        "menus": [],
+        "submenus": [],
+    }, "Check that repair_counters fixes drifted counters"
+    assert [str(row["id"]) for row in repaired["menus"]] == [
+        MENU_ID
+    ], "Check that repaired menus are returned"
+
+    await invalidate_counters(
+        BaseCacheService(test_cache, test_local_cache),
+        repaired,
+    )
+    response = await async_client.get(menu_url)
+    assert (
+        response.json()["dishes_count"] == dishes_count
+    ), "Check that cached menu with repaired counters is dropped"
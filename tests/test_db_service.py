@@ -0,0 +1,103 @@
+import datetime
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models import Dish, DishCreate, DishUpdate
+from app.services.dish import DishModelService
+
+SUBMENU_ID = uuid.UUID("127c9770-456c-478d-a086-e8e313e64d68")
+
+
+class ReturningSession:
+    """Session of a database with RETURNING support, returning given rows."""
+
+    def __init__(self, *rows: dict | None):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(full_returning=True))
+        self.rows = list(rows)
+        self.statements: list = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        row = self.rows.pop(0)
+        return SimpleNamespace(
+            mappings=lambda: SimpleNamespace(one_or_none=lambda: row),
+        )
+
+    async def commit(self):
+        pass
+
+
+def dish_row(**values) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "created_at": datetime.datetime(2023, 1, 1),
+        "title": "Dish",
+        "description": "Dish description",
+        "price": Decimal("12.50"),
+        "submenu_id": SUBMENU_ID,
+        **values,
+    }
+
+
+def assert_returning(statements: list, *kinds: str):
+    assert [statement.__visit_name__ for statement in statements] == list(
+        kinds
+    ), "Check that each write takes a single statement"
+    assert all(
+        statement._returning for statement in statements
+    ), "Check that every statement returns the changed row"
+
+
+@pytest.mark.asyncio
+async def test_create_returning():
+    """Test that create builds the read data from the inserted row."""
+    row = dish_row()
+    session = ReturningSession(
+        row,
+        {"dishes_count": 3},
+        {"dishes_count": 5},
+    )
+    item, counters = await DishModelService(Dish, session).create(
+        DishCreate(title="Dish", description="Dish description", price="12.50"),
+        submenu_id=SUBMENU_ID,
+    )
+    assert_returning(session.statements, "insert", "update", "update")
+    assert item == row, "Check that the read data is the returned row"
+    assert counters == {
+        "submenu": {"dishes_count": 3},
+        "menu": {"dishes_count": 5},
+    }, "Check that counters are the returned values"
+
+
+@pytest.mark.asyncio
+async def test_update_returning():
+    """Test that update builds the read data from the updated row."""
+    row = dish_row(title="Changed")
+    session = ReturningSession(row)
+    item = await DishModelService(Dish, session).update(
+        row["id"],
+        DishUpdate(title="Changed"),
+    )
+    assert_returning(session.statements, "update")
+    assert item == row, "Check that the read data is the returned row"
+
+
+@pytest.mark.asyncio
+async def test_delete_returning():
+    """Test that delete updates counters from the deleted row."""
+    row = dish_row()
+    session = ReturningSession(
+        row,
+        {"dishes_count": 2},
+        {"dishes_count": 4},
+    )
+    response, counters = await DishModelService(Dish, session).delete(row["id"])
+    assert_returning(session.statements, "delete", "update", "update")
+    assert response.status_code == 200
+    assert counters == {
+        "submenu": {"dishes_count": 2},
+        "menu": {"dishes_count": 4},
+    }, "Check that counters are the returned values"
@@ -0,0 +1,71 @@
+import pytest
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.services.base_cache_service import BaseCacheService
+from app.services.counters import check_counters
+from app.services.load_data import import_catalog
+
+MENUS_URL = f"{settings.API_V1_STR}/menus/"
+
+
+@pytest.mark.asyncio
+async def test_load_data(async_client: AsyncClient, test_session: AsyncSession):
+    """Test that initial data is loaded and served."""
+    menus = (await async_client.get(MENUS_URL)).json()
+    response = await async_client.post(f"{settings.API_V1_STR}/load_data/")
+    assert response.status_code == 201
+
+    loaded = (await async_client.get(MENUS_URL)).json()
+    assert len(loaded) > len(menus), "Check that cached menus list is invalidated"
+    assert await check_counters(test_session) == {"menus": [], "submenus": []}
+
+
+@pytest.mark.asyncio
+async def test_import_catalog(
+    async_client: AsyncClient,
+    test_session: AsyncSession,
+    test_cache,
+):
+    """Test that catalog is imported in batches and keeps its order."""
+    catalog = [
+        {
+            "title": f"Imported {menu}",
+            "description": "Menu",
+            "submenus": [
+                {
+                    "title": f"Submenu {submenu}",
+                    "description": "Submenu",
+                    "dishes": [
+                        {
+                            "title": f"Dish {dish}",
+                            "description": "Dish",
+                            "price": "10.50",
+                        }
+                        for dish in range(3)
+                    ],
+                }
+                for submenu in range(2)
+            ],
+        }
+        for menu in range(2)
+    ]
+    counts = await import_catalog(
+        test_session,
+        BaseCacheService(test_cache),
+        catalog,
+    )
+    assert counts == {"menus": 2, "submenus": 4, "dishes": 12}
+
+    menus = [
+        menu
+        for menu in (await async_client.get(MENUS_URL)).json()
+        if menu["title"].startswith("Imported ")
+    ]
+    assert [menu["title"] for menu in menus] == ["Imported 0", "Imported 1"]
+    assert menus[0]["submenus_count"] == 2 and menus[0]["dishes_count"] == 6
+    submenus_url = f"{MENUS_URL}{menus[1]['id']}/submenus/"
+    submenu = (await async_client.get(submenus_url)).json()[1]
+    dishes = (await async_client.get(f"{submenus_url}{submenu['id']}/dishes/")).json()
+    assert [dish["title"] for dish in dishes] == ["Dish 0", "Dish 1", "Dish 2"]
@@ -0,0 +1,236 @@
+import datetime
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import inspect
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import ExcelStyle, settings
+from app.db.models import Dish, Menu
+from app.services import report_registry, reports
+from app.services.dish import DishModelService
+from app.services.menu import MenuModelService
+from app.services.reports import (
+    menus_report_rows,
+    report_status,
+    run_menus_report,
+    set_report_status,
+)
+from app.services.xlsx_report import report_rows
+from tests.conftest import FakeCacheService
+
+MENU_ID = "f47d47e4-efb5-4700-8147-ddcc5987b1fc"
+
+
+@pytest.mark.asyncio
+async def test_menus_report_rows(test_session: AsyncSession):
+    """Test that report rows stream the whole menus tree in list order."""
+    rows = [dict(row) async for row in menus_report_rows(test_session)]
+    menus = await MenuModelService(Menu, test_session).list_read()
+    assert list(dict.fromkeys(row["menu_id"] for row in rows)) == [
+        menu["id"] for menu in menus
+    ], "Check that report contains all menus in list order"
+    dishes = await DishModelService(Dish, test_session).list_read()
+    assert {row["dish_id"] for row in rows} - {None} == {
+        dish["id"] for dish in dishes
+    }, "Check that report contains dishes of all submenus"
+
+    report = list(report_rows(rows))
+    assert [style for style, _ in report].count(ExcelStyle.Base) == len(dishes)
+    assert report[0] == (
+        ExcelStyle.Header,
+        [1, menus[0]["title"], menus[0]["description"]],
+    ), "Check that report starts with the first menu"
+
+
+@pytest.mark.asyncio
+async def test_menus_report_snapshot(test_session: AsyncSession):
+    """Test that report rows skip objects created after the request."""
+    requested_at = datetime.datetime.utcnow()
+    test_session.add(Menu(title="New menu", description="New menu"))
+    await test_session.commit()
+
+    titles = {
+        row["menu_title"]
+        async for row in menus_report_rows(test_session, created_before=requested_at)
+    }
+    assert "New menu" not in titles, "Check that report is a snapshot"
+    titles = {row["menu_title"] async for row in menus_report_rows(test_session)}
+    assert "New menu" in titles, "Check that menus without submenus are listed"
+
+
+@pytest.mark.asyncio
+async def test_get_does_not_load_relationships(test_session: AsyncSession):
+    """Test that relationships are not loaded with objects."""
+    test_session.expunge_all()
+    menu = await MenuModelService(Menu, test_session).get(MENU_ID)
+    assert "submenus" in inspect(menu).unloaded, "Check that submenus are lazy"
+
+
+@pytest.mark.asyncio
+async def test_report_reuse(
+    async_client: AsyncClient,
+    test_cache: FakeCacheService,
+    monkeypatch,
+    tmp_path,
+):
+    """Test that reports of an unchanged catalog share one task and file."""
+    queued = []
+    monkeypatch.setattr(settings, "FILES_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        report_registry.generate_menu_xlsx,
+        "apply_async",
+        lambda args, task_id: queued.append(task_id),
+    )
+    url = f"{settings.API_V1_STR}/reports/menus"
+
+    first = await async_client.post(url)
+    second = await async_client.post(url)
+    assert first.status_code == second.status_code == 202
+    assert len(queued) == 1, "Check that requests of one version share a task"
+    assert second.json() == {
+        "task_id": queued[0],
+        "task_status": "PENDING",
+        "task_result": None,
+    }
+
+    await set_report_status(test_cache, queued[0], "FAILURE", "Error")
+    response = await async_client.post(url)
+    assert response.status_code == 202
+    assert len(queued) == 2, "Check that failed task is replaced"
+
+    (tmp_path / f"{queued[1]}.xlsx").write_bytes(b"report")
+    response = await async_client.post(url)
+    assert response.status_code == 200, "Check that ready report is reused"
+    response = await async_client.get(f"{url}/{queued[1]}")
+    assert response.content == b"report"
+
+    await async_client.patch(
+        f"{settings.API_V1_STR}/menus/{MENU_ID}",
+        json={"title": "Changed"},
+    )
+    response = await async_client.post(url)
+    assert response.status_code == 202
+    assert len(queued) == 3, "Check that changed catalog gets a new report"
+
+
+@pytest.mark.asyncio
+async def test_run_menus_report(
+    test_cache: FakeCacheService,
+    monkeypatch,
+    tmp_path,
+):
+    """Test that the worker saves the report status and keeps the report."""
+
+    @asynccontextmanager
+    async def cache():
+        yield test_cache
+
+    async def write_report(requested_at: datetime.datetime, path: str):
+        with open(path, "wb") as file:
+            file.write(b"report")
+
+    async def fail(requested_at: datetime.datetime, path: str):
+        raise RuntimeError("Database is gone")
+
+    monkeypatch.setattr(reports, "task_cache", cache)
+    requested_at = datetime.datetime.utcnow()
+    test_cache.storage["report:version"] = b"failed"
+    monkeypatch.setattr(reports, "write_menus_report", fail)
+    with pytest.raises(RuntimeError):
+        await run_menus_report(
+            "failed", requested_at, str(tmp_path / "failed.xlsx"), "report:version"
+        )
+    assert (await report_status(test_cache, "failed"))["task_status"] == "FAILURE"
+    assert (
+        "report:version" not in test_cache.storage
+    ), "Check that failed task is not reused"
+
+    test_cache.storage["report:version"] = b"done"
+    monkeypatch.setattr(reports, "write_menus_report", write_report)
+    await run_menus_report(
+        "done", requested_at, str(tmp_path / "done.xlsx"), "report:version"
+    )
+    assert await report_status(test_cache, "done") == {
+        "task_id": "done",
+        "task_status": "SUCCESS",
+        "task_result": "done",
+    }
+    assert (tmp_path / "done.xlsx").read_bytes() == b"report"
+    assert test_cache.storage["report:version"] == b"done"
+
+
+async def get_report_events(async_client: AsyncClient, task_id: str) -> list:
+    response = await async_client.get(
+        f"{settings.API_V1_STR}/reports/menus/{task_id}/events"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return [
+        block.splitlines()
+        for block in response.text.split("\n\n")
+        if block.startswith("event:")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_report_events(
+    async_client: AsyncClient,
+    monkeypatch,
+    tmp_path,
+):
+    """Test that report events stream status changes and the download URL."""
+    task_id = "c1c2c3c4-d1d2-4e1e-8f1f-a1a2a3a4a5a6"
+    statuses = iter(["PENDING", "PENDING", "STARTED"])
+
+    async def worker_report_status(cache: FakeCacheService, task_id: str) -> dict:
+        task_status = next(statuses, None)
+        if task_status is None:
+            (tmp_path / f"{task_id}.xlsx").write_bytes(b"report")
+            await set_report_status(cache, task_id, "SUCCESS", task_id)
+        else:
+            await set_report_status(cache, task_id, task_status)
+        return await report_status(cache, task_id)
+
+    monkeypatch.setattr(settings, "FILES_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "REPORT_EVENTS_INTERVAL", 0)
+    monkeypatch.setattr(report_registry, "report_status", worker_report_status)
+
+    events = await get_report_events(async_client, task_id)
+    assert [lines[0] for lines in events] == [
+        "event: status",
+        "event: status",
+        "event: status",
+        "event: ready",
+    ], "Check that only status changes are streamed"
+    assert [json.loads(lines[1][6:])["task_status"] for lines in events] == [
+        "PENDING",
+        "STARTED",
+        "SUCCESS",
+        "SUCCESS",
+    ]
+    ready = json.loads(events[-1][1][6:])
+    assert ready["download_url"].endswith(
+        f"{settings.API_V1_STR}/reports/menus/{task_id}"
+    )
+
+
+@pytest.mark.asyncio
+async def test_report_events_failure(
+    async_client: AsyncClient,
+    test_cache: FakeCacheService,
+    monkeypatch,
+    tmp_path,
+):
+    """Test that failure of the report task saved by a worker ends events."""
+    task_id = "c1c2c3c4-d1d2-4e1e-8f1f-a1a2a3a4a5a6"
+    monkeypatch.setattr(settings, "FILES_DIR", str(tmp_path))
+    await set_report_status(test_cache, task_id, "FAILURE", "Error")
+
+    events = await get_report_events(async_client, task_id)
+    assert [lines[0] for lines in events] == ["event: status", "event: failed"]
+    response = await async_client.get(f"{settings.API_V1_STR}/reports/menus/{task_id}")
+    assert response.status_code == 425
+    assert response.json()["detail"]["task_status"] == "FAILURE"
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_calls():
+    """Test that concurrent calls with the same key run the function once."""
+    single_flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", load) for _ in range(10)),
+    )
+    assert results == ["value"] * 10, "Check that all callers get the result"
+    assert len(calls) == 1, "Check that the function is called once"
+    assert not single_flight.in_flight("key"), "Check that the call is finished"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    """Test that an error of the call is raised to all callers."""
+    single_flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("not found")
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", load) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert all(
+        isinstance(result, ValueError) for result in results
+    ), "Check that all callers get the error"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_leader_cancelled():
+    """Test that cancelling the running caller does not cancel the others."""
+    single_flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    leader = asyncio.create_task(single_flight.do("key", load))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(single_flight.do("key", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    results = await asyncio.gather(*followers)
+    assert results == ["value"] * 3, "Check that followers get the result"
+    assert len(calls) == 2, "Check that one follower runs the function again"
+    assert leader.cancelled(), "Check that the running caller is cancelled"
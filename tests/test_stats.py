@@ -0,0 +1,73 @@
+from contextlib import nullcontext
+
+import pytest
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import main
+from app.core.config import settings
+from app.db.local_cache import LocalCache
+from app.services import warm_up
+from app.services.cache_keys import MENU_SCOPE, WARM_UP_KEY
+from tests.conftest import FakeCacheService
+
+MENU_ID = "f47d47e4-efb5-4700-8147-ddcc5987b1fc"
+
+
+@pytest.mark.asyncio
+async def test_db_pool_stats(async_client: AsyncClient):
+    response = await async_client.get(f"{settings.API_V1_STR}/stats/db_pool")
+    assert (
+        response.status_code == 200
+    ), "Check that DB pool stats endpoint is available and returns 200 code"
+
+    resp_json = response.json()
+    for key in ("size", "checked_out", "overflow", "wait_time_avg"):
+        assert key in resp_json, f"Check that pool stats contain '{key}'"
+    assert (
+        resp_json["size"] == settings.PG_POOL_SIZE
+    ), "Check that engine pool size is taken from settings"
+
+
+@pytest.mark.asyncio
+async def test_readiness(async_client: AsyncClient):
+    response = await async_client.get(f"{settings.API_V1_STR}/stats/ready")
+    assert response.status_code == 200, "Check that app without warm-up is ready"
+    assert response.json() == {"ready": True}
+
+
+@pytest.mark.asyncio
+async def test_startup_warm_up(
+    test_session: AsyncSession,
+    test_cache: FakeCacheService,
+    test_local_cache: LocalCache,
+    monkeypatch,
+):
+    """Test that the startup hook warms up the cache."""
+
+    async def get_test_cache() -> FakeCacheService:
+        return test_cache
+
+    async def get_test_local_cache() -> LocalCache:
+        return test_local_cache
+
+    async def open_test_cache() -> None:
+        pass
+
+    monkeypatch.setattr(settings, "CACHE_WARM_UP_ON_STARTUP", True)
+    monkeypatch.setattr(main, "open_cache", open_test_cache)
+    monkeypatch.setattr(main, "get_cache", get_test_cache)
+    monkeypatch.setattr(main, "get_local_cache", get_test_local_cache)
+    monkeypatch.setattr(warm_up, "async_session", lambda: nullcontext(test_session))
+    monkeypatch.setattr(warm_up, "warm_up_task", None)
+
+    await main.startup()
+    assert warm_up.warm_up_task is not None, "Check that warm-up is started"
+    await warm_up.warm_up_task
+    assert warm_up.is_ready(), "Check that warm-up is finished"
+    for key in (
+        MENU_SCOPE.item_key(MENU_ID),
+        MENU_SCOPE.page_key(None, settings.PAGE_DEFAULT_LIMIT),
+        WARM_UP_KEY,
+    ):
+        assert key in test_cache.storage, f"Check that '{key}' is warmed up"
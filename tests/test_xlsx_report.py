@@ -0,0 +1,94 @@
+import pytest
+from openpyxl import load_workbook
+
+from app.core.config import ExcelStyle
+from app.services.xlsx_report import (
+    report_rows,
+    stream_menus_xlsx,
+    stream_report_rows,
+    write_menus_xlsx,
+)
+
+CATALOG_ROWS = [
+    {
+        "menu_id": 1,
+        "menu_title": "Menu",
+        "menu_description": "Menu description",
+        "submenu_id": 1,
+        "submenu_title": "Submenu",
+        "submenu_description": "Submenu description",
+        "dish_id": 1,
+        "dish_title": "Dish",
+        "dish_description": "Dish description",
+        "dish_price": "1.50",
+    },
+    {
+        "menu_id": 1,
+        "menu_title": "Menu",
+        "menu_description": "Menu description",
+        "submenu_id": 2,
+        "submenu_title": "Empty submenu",
+        "submenu_description": "Submenu without dishes",
+        "dish_id": None,
+        "dish_title": None,
+        "dish_description": None,
+        "dish_price": None,
+    },
+    {
+        "menu_id": 2,
+        "menu_title": "Empty menu",
+        "menu_description": "Menu without submenus",
+        "submenu_id": None,
+        "submenu_title": None,
+        "submenu_description": None,
+        "dish_id": None,
+        "dish_title": None,
+        "dish_description": None,
+        "dish_price": None,
+    },
+]
+
+EXPECTED_VALUES = [
+    [1, "Menu", "Menu description", None, None, None],
+    [None, 1, "Submenu", "Submenu description", None, None],
+    [None, None, 1, "Dish", "Dish description", "1.50"],
+    [None, 2, "Empty submenu", "Submenu without dishes", None, None],
+    [2, "Empty menu", "Menu without submenus", None, None, None],
+]
+
+
+@pytest.mark.parametrize("write_only", (True, False))
+def test_write_menus_xlsx(tmp_path, write_only: bool):
+    """Test that streaming and in-memory reports have the same content."""
+    path = tmp_path / "report.xlsx"
+    write_menus_xlsx(report_rows(CATALOG_ROWS), str(path), write_only=write_only)
+
+    ws = load_workbook(path).active
+    assert ws.title == "Меню"
+    assert [
+        list(row) for row in ws.iter_rows(values_only=True)
+    ] == EXPECTED_VALUES, "Check that report rows follow the menus tree"
+    assert ws["F1"].fill.fgColor.rgb == "00CCCCCC", "Check menu row fill"
+    assert ws["A3"].border.left.style == "thin", "Check empty cells borders"
+    assert ws["D2"].font.bold and not ws["D3"].font.bold
+    assert ws.column_dimensions["E"].width == ExcelStyle.ColumnWidths["E"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("write_only", (True, False))
+async def test_stream_menus_xlsx(tmp_path, write_only: bool):
+    """Test that report rows are written as catalog rows arrive."""
+
+    async def catalog_rows():
+        for row in CATALOG_ROWS:
+            yield row
+
+    path = tmp_path / "report.xlsx"
+    await stream_menus_xlsx(
+        stream_report_rows(catalog_rows()),
+        str(path),
+        write_only=write_only,
+    )
+
+    ws = load_workbook(path).active
+    assert [list(row) for row in ws.iter_rows(values_only=True)] == EXPECTED_VALUES